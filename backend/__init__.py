@@ -0,0 +1,9 @@
+# Backend package. Run the API as backend.server:app from the repository root.
+#
+# backend/.env is loaded here, before any submodule reads its settings from
+# os.environ at import time. Variables already set in the environment win.
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / ".env")
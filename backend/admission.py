@@ -0,0 +1,208 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from .metrics import ADMISSION_REJECTIONS
+
+# Lane settings: concurrency limit bounds, queue length and wait, and the
+# latency above which the limit backs off. Health has a fixed limit so probes
+# and scrapes keep answering; exports have a small fixed limit so a few large
+# downloads cannot take every connection; auth and admin are isolated from
+# general traffic.
+LANE_DEFAULTS = {
+    "health": {"initial": 20, "min": 20, "max": 20, "queue": 20, "queue_timeout_ms": 100, "target_latency_ms": 1000},
+    "auth": {"initial": 20, "min": 4, "max": 100, "queue": 50, "queue_timeout_ms": 500, "target_latency_ms": 1500},
+    "export": {"initial": 2, "min": 2, "max": 2, "queue": 4, "queue_timeout_ms": 1000, "target_latency_ms": 60000},
+    "admin": {"initial": 10, "min": 2, "max": 50, "queue": 20, "queue_timeout_ms": 500, "target_latency_ms": 2000},
+    "default": {"initial": 100, "min": 10, "max": 1000, "queue": 100, "queue_timeout_ms": 250, "target_latency_ms": 500},
+}
+
+# Event streams stay open indefinitely and are bounded by the status hub instead
+UNLIMITED_PATHS = ("/api/status/stream",)
+
+
+def classify_request(path: str) -> Optional[str]:
+    """Lane for a request path, or None to bypass admission control"""
+    if path.startswith(UNLIMITED_PATHS):
+        return None
+    if path in ("/api/health", "/api/ready", "/metrics"):
+        return "health"
+    if path.startswith("/api/status/export"):
+        return "export"
+    if path.startswith("/api/auth"):
+        return "auth"
+    if path.startswith(("/api/users", "/api/health/")):
+        return "admin"
+    return "default"
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit.
+
+    Each request completing under ``target_latency`` grows the limit by
+    ``1/limit`` (about +1 per limit's worth of requests); a slower request or
+    a rejection multiplies it by ``backoff``, at most once per
+    ``cooldown`` seconds so one burst of slow requests counts once.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int,
+                 target_latency: float, backoff: float = 0.9, cooldown: float = 1.0):
+        self.value = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return int(self.value)
+
+    def decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown:
+            self.value = max(self.min_limit, self.value * self.backoff)
+            self._last_decrease = now
+
+    def on_sample(self, latency: float) -> None:
+        if latency > self.target_latency:
+            self.decrease()
+        else:
+            self.value = min(self.max_limit, self.value + 1 / self.value)
+
+
+class Lane:
+    """Concurrency slots for one class of requests with a short bounded queue"""
+
+    def __init__(self, name: str, limit: AdaptiveLimit, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: deque = deque()
+        self._rejection_counter = ADMISSION_REJECTIONS.labels(name)
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting up to ``queue_timeout``; False means shed the request"""
+        if self.in_flight < self.limit.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            return self._reject()
+        except BaseException:
+            # Cancelled while queued: hand back a slot we may have been given
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)
+            self._discard(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def _discard(self, waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> bool:
+        self.rejected += 1
+        self._rejection_counter.inc()
+        self.limit.decrease()
+        return False
+
+    def release(self, latency: Optional[float]) -> None:
+        """Free a slot and pass it to the oldest waiter while under the limit"""
+        self.in_flight -= 1
+        if latency is not None:
+            self.limit.on_sample(latency)
+        while self._waiters and self.in_flight < self.limit.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit.limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def create_lanes() -> Dict[str, Lane]:
+    """Lanes from LANE_DEFAULTS, overridable with ADMISSION_<LANE>_<SETTING>"""
+    lanes = {}
+    for name, defaults in LANE_DEFAULTS.items():
+        settings = {
+            key: float(os.environ.get(f"ADMISSION_{name.upper()}_{key.upper()}", value))
+            for key, value in defaults.items()
+        }
+        lanes[name] = Lane(
+            name,
+            AdaptiveLimit(
+                initial=int(settings["initial"]),
+                min_limit=int(settings["min"]),
+                max_limit=int(settings["max"]),
+                target_latency=settings["target_latency_ms"] / 1000
+            ),
+            max_queue=int(settings["queue"]),
+            queue_timeout=settings["queue_timeout_ms"] / 1000
+        )
+    return lanes
+
+
+class AdmissionMiddleware:
+    """Shed load with 503 + Retry-After instead of queueing without bound"""
+
+    def __init__(self, app, lanes: Dict[str, Lane],
+                 classify: Callable[[str], Optional[str]] = classify_request, retry_after: int = 1):
+        self.app = app
+        self.lanes = lanes
+        self.classify = classify
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        lane = self.lanes.get(self.classify(scope["path"]))
+        if lane is None:
+            return await self.app(scope, receive, send)
+
+        if not await lane.acquire():
+            return await self._reject(send)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.perf_counter() - started)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
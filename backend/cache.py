@@ -0,0 +1,85 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Optional
+
+from .metrics import CACHE_REQUESTS
+
+
+@dataclass
+class CachedResponse:
+    """Serialized response body plus the generation it was built from"""
+    body: bytes
+    generation: int
+    created_at: float = field(default_factory=time.monotonic)
+    # Compressed copies of body keyed by content coding, filled on demand
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """Write-invalidated cache of serialized response bodies.
+
+    Entries are keyed by query shape. Every write to the underlying collection
+    bumps the generation counter, which invalidates all entries at once.
+    ``max_staleness`` bounds how long an entry may be served even without a
+    local write, which covers writes made by other processes.
+    """
+
+    def __init__(self, max_staleness: float = 5.0, max_entries: int = 128,
+                 clock: Callable[[], float] = time.monotonic, name: str = "response"):
+        self.name = name
+        self.max_staleness = max_staleness
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: Dict[Hashable, CachedResponse] = {}
+        self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+        self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_staleness > 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """Return a fresh entry for ``key`` or None"""
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry.generation != self.generation
+            or self._clock() - entry.created_at > self.max_staleness
+        ):
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+        self.hits += 1
+        self._hit_counter.inc()
+        return entry
+
+    def set(self, key: Hashable, body: bytes, generation: int) -> CachedResponse:
+        """Store ``body`` built at ``generation``.
+
+        The generation must be read before the query is issued, so a write that
+        lands while the query is in flight leaves the entry already stale.
+        """
+        entry = CachedResponse(body=body, generation=generation, created_at=self._clock())
+        if not self.enabled or generation != self.generation:
+            return entry
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Drop the oldest entry; dicts keep insertion order
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = entry
+        return entry
+
+    def invalidate(self) -> None:
+        """Bump the generation so every cached entry becomes stale"""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
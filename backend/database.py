@@ -1,25 +1,98 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 import os
+import asyncio
+import fcntl
 import logging
-from typing import Optional
+import importlib.util
+from typing import Dict, List, Optional
+
+from .db_profiler import command_profiler
+from .metrics import mongo_command_metrics
+from .pool_metrics import pool_metrics
 
 logger = logging.getLogger(__name__)
 
+# Environment variables mapped to integer MongoClient options
+MONGO_INT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+# Wire compressors and the module pymongo needs for each
+MONGO_COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": "zlib",
+}
+
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    index_lock = None
+    read_databases: Dict[str, AsyncIOMotorDatabase] = {}
+
+# Read preference modes that can be assigned to routes
+READ_PREFERENCE_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# MongoDB rejects maxStalenessSeconds below 90
+MIN_MAX_STALENESS_SECONDS = 90
 
 # Database instance
 db_instance = Database()
 
+def mongo_client_options() -> dict:
+    """Build MongoClient keyword options from the environment"""
+    options = {}
+    for env_name, option in MONGO_INT_OPTIONS.items():
+        value = os.environ.get(env_name)
+        if value:
+            options[option] = int(value)
+
+    compressors = []
+    for name in filter(None, (c.strip() for c in os.environ.get("MONGO_COMPRESSORS", "").split(","))):
+        module = MONGO_COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"Ignoring unknown MongoDB compressor: {name}")
+        elif importlib.util.find_spec(module) is None:
+            logger.warning(f"Ignoring MongoDB compressor {name}: {module} is not installed")
+        else:
+            compressors.append(name)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+        zlib_level = os.environ.get("MONGO_ZLIB_COMPRESSION_LEVEL")
+        if zlib_level:
+            options["zlibCompressionLevel"] = int(zlib_level)
+
+    options["event_listeners"] = [pool_metrics, mongo_command_metrics, command_profiler]
+    return options
+
 async def connect_to_mongo():
     """Create database connection"""
     mongo_url = os.environ['MONGO_URL']
     db_name = os.environ['DB_NAME']
     
+    options = mongo_client_options()
     logger.info(f"Connecting to MongoDB: {mongo_url}")
-    db_instance.client = AsyncIOMotorClient(mongo_url)
+    logger.info(
+        "MongoDB client options: "
+        + ", ".join(f"{k}={v}" for k, v in options.items() if k != "event_listeners")
+    )
+    db_instance.client = AsyncIOMotorClient(mongo_url, **options)
     db_instance.database = db_instance.client[db_name]
+    db_instance.read_databases = {}
     
     # Test connection
     try:
@@ -41,17 +114,144 @@ async def get_database() -> AsyncIOMotorDatabase:
         raise Exception("Database not initialized")
     return db_instance.database
 
+def declared_indexes() -> Dict[str, List[IndexModel]]:
+    """Indexes every collection is expected to have, keyed by collection name"""
+    ttl_seconds = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+    return {
+        # Users collection indexes
+        "users": [
+            IndexModel("email", unique=True),
+            IndexModel("created_at"),
+            IndexModel("role"),
+        ],
+        # Status checks collection indexes
+        "status_checks": [
+            IndexModel("timestamp"),
+            IndexModel("client_name"),
+        ],
+        # Last-seen-per-client table
+        "client_heartbeats": [
+            IndexModel("client_name", unique=True),
+            IndexModel("last_seen"),
+        ],
+        # Stored responses for Idempotency-Key retries
+        "idempotency_keys": [
+            IndexModel("created_at", expireAfterSeconds=ttl_seconds),
+        ],
+    }
+
+def is_index_leader() -> bool:
+    """Whether this process should reconcile indexes.
+
+    MONGO_INDEX_MODE is "always", "never" or "leader" (the default). In leader
+    mode the first worker on a host to take an exclusive lock on
+    MONGO_INDEX_LOCK_FILE reconciles; the lock is held for the life of the
+    process so the other workers skip.
+    """
+    mode = os.environ.get("MONGO_INDEX_MODE", "leader").lower()
+    if mode in ("always", "never"):
+        return mode == "always"
+    if db_instance.index_lock is not None:
+        return True
+    lock_path = os.environ.get("MONGO_INDEX_LOCK_FILE", "/tmp/backend-index-leader.lock")
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    db_instance.index_lock = lock_file
+    return True
+
+# Index options whose drift is reported; changing them needs the index rebuilt
+COMPARED_INDEX_OPTIONS = {"unique": False, "expireAfterSeconds": None}
+
+async def reconcile_collection_indexes(db: AsyncIOMotorDatabase, collection: str, indexes: List[IndexModel]) -> List[str]:
+    """Create the declared indexes missing from ``collection`` in one createIndexes command.
+
+    An existing index with the declared name but different options is left as
+    is and logged, since createIndexes would fail on it.
+    """
+    existing = {index["name"]: index async for index in db[collection].list_indexes()}
+    missing = []
+    for index in indexes:
+        declared = index.document
+        current = existing.get(declared["name"])
+        if current is None:
+            missing.append(index)
+            continue
+        for option, default in COMPARED_INDEX_OPTIONS.items():
+            if current.get(option, default) != declared.get(option, default):
+                logger.warning(
+                    f"Index {collection}.{declared['name']} has {option}={current.get(option, default)}, "
+                    f"declared {declared.get(option, default)}; drop it to have it rebuilt"
+                )
+    if missing:
+        return await db[collection].create_indexes(missing)
+    return []
+
+def route_read_preference(route: str) -> str:
+    """Read preference mode configured for ``route``.
+
+    MONGO_READ_ROUTING maps route names to modes, e.g.
+    "users.list=secondaryPreferred,status.export=secondary". Unlisted routes
+    read from the primary.
+    """
+    routing = {}
+    for entry in os.environ.get("MONGO_READ_ROUTING", "").split(","):
+        if "=" in entry:
+            name, mode = entry.split("=", 1)
+            routing[name.strip()] = mode.strip()
+    mode = routing.get(route, "primary")
+    if mode not in READ_PREFERENCE_MODES:
+        logger.warning(f"Unknown read preference {mode} for {route}, using primary")
+        return "primary"
+    return mode
+
+def build_read_preference(mode: str):
+    """Read preference for ``mode`` bounded by MONGO_MAX_STALENESS_SECONDS"""
+    if mode == "primary":
+        return Primary()
+    max_staleness = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", "-1"))
+    if 0 < max_staleness < MIN_MAX_STALENESS_SECONDS:
+        logger.warning(f"MONGO_MAX_STALENESS_SECONDS raised to the minimum of {MIN_MAX_STALENESS_SECONDS}")
+        max_staleness = MIN_MAX_STALENESS_SECONDS
+    return READ_PREFERENCE_MODES[mode](max_staleness=max_staleness)
+
+def read_database(route: str):
+    """Dependency factory like get_database, for read-only handlers.
+
+    The returned dependency yields the database handle with the read
+    preference configured for ``route``, so expensive reads can be moved off
+    the primary. Handles are built once per mode.
+    """
+    resolved = {}
+
+    async def get_read_database() -> AsyncIOMotorDatabase:
+        db = await get_database()
+        if "mode" not in resolved:
+            resolved["mode"] = route_read_preference(route)
+        mode = resolved["mode"]
+        if mode == "primary":
+            return db
+        if mode not in db_instance.read_databases:
+            db_instance.read_databases[mode] = db.with_options(read_preference=build_read_preference(mode))
+        return db_instance.read_databases[mode]
+    return get_read_database
+
 async def create_indexes():
-    """Create database indexes for performance"""
+    """Reconcile database indexes with the declared set, in parallel across collections"""
+    if not is_index_leader():
+        logger.info("Skipping index reconciliation on non-leader worker")
+        return
     db = await get_database()
-    
-    # Users collection indexes
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("created_at")
-    await db.users.create_index("role")
-    
-    # Status checks collection indexes
-    await db.status_checks.create_index("timestamp")
-    await db.status_checks.create_index("client_name")
-    
-    logger.info("Database indexes created successfully")
+    declared = declared_indexes()
+    created = await asyncio.gather(*(
+        reconcile_collection_indexes(db, collection, indexes)
+        for collection, indexes in declared.items()
+    ))
+    created_names = [name for names in created for name in names]
+    if created_names:
+        logger.info(f"Created database indexes: {', '.join(created_names)}")
+    else:
+        logger.info("Database indexes are up to date")
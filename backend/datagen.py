@@ -0,0 +1,257 @@
+"""Bulk-generate realistic users and status checks for performance work.
+
+    python -m backend.datagen users --count 1000000
+    python -m backend.datagen status-checks --count 10000000 --clients 5000 --days 90
+
+Documents are built as plain dicts shaped like the ``User`` and
+``StatusCheck`` models (validating millions of models would take longer than
+inserting them) and written with unordered ``insert_many`` batches from
+several producer processes, each with its own connection.
+"""
+import math
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import typer
+from pymongo import MongoClient, UpdateOne
+
+from .models import StatusCheck, User, UserRole
+
+app = typer.Typer(help=__doc__.splitlines()[0], add_completion=False)
+
+MongoUrl = typer.Option(None, help="MongoDB URL (default: $MONGO_URL)")
+DbName = typer.Option(None, help="database name (default: $DB_NAME)")
+
+
+def connect(mongo_url: Optional[str], db_name: Optional[str]):
+    client = MongoClient(mongo_url or os.environ["MONGO_URL"])
+    return client, client[db_name or os.environ["DB_NAME"]]
+
+
+def hash_passwords(count: int, rounds: int) -> List[tuple]:
+    """(password, bcrypt hash) pairs computed once and shared by every generated user"""
+    from passlib.hash import bcrypt
+
+    passwords = [f"Generated{i}!" for i in range(count)]
+    return [(password, bcrypt.using(rounds=rounds).hash(password)) for password in passwords]
+
+
+def user_batch(start: int, size: int, run_id: str, passwords: List[tuple], days: int,
+               admin_ratio: float, inactive_ratio: float, rng: random.Random) -> List[dict]:
+    now = datetime.utcnow()
+    docs = []
+    for i in range(start, start + size):
+        created_at = now - timedelta(seconds=rng.random() * days * 86400)
+        docs.append({
+            "email": f"user{i}.{run_id}@example.com",
+            "full_name": f"Generated User {i}",
+            "is_active": rng.random() >= inactive_ratio,
+            "role": UserRole.ADMIN.value if rng.random() < admin_ratio else UserRole.USER.value,
+            "id": str(uuid.uuid4()),
+            "created_at": created_at,
+            "updated_at": created_at,
+            "last_login": created_at + (now - created_at) * rng.random() if rng.random() < 0.8 else None,
+            "password_hash": passwords[i % len(passwords)][1],
+        })
+    return docs
+
+
+def client_weights(clients: int, client_skew: float) -> List[float]:
+    """Zipf-like popularity: client k gets weight 1 / k**client_skew (0 is uniform)"""
+    return [1 / (k ** client_skew) for k in range(1, clients + 1)]
+
+
+def status_check_batch(start: int, size: int, client_names: List[str], cumulative_weights: List[float],
+                       days: int, time_skew: float, rng: random.Random) -> List[dict]:
+    now = datetime.utcnow()
+    span = days * 86400
+    names = rng.choices(client_names, cum_weights=cumulative_weights, k=size)
+    # rng.random() ** time_skew > 1 crowds timestamps towards now, like a growing fleet
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "client_name": name,
+            "timestamp": now - timedelta(seconds=span * rng.random() ** time_skew),
+        }
+        for name in names
+    ]
+
+
+def summarize_heartbeats(docs: List[dict], summary: Dict[str, list]) -> None:
+    """Fold status checks into ``summary``: client_name -> [checks, last_seen]"""
+    for doc in docs:
+        entry = summary.get(doc["client_name"])
+        if entry is None:
+            summary[doc["client_name"]] = [1, doc["timestamp"]]
+        else:
+            entry[0] += 1
+            entry[1] = max(entry[1], doc["timestamp"])
+
+
+def merge_summaries(total: Dict[str, list], summary: Dict[str, list]) -> None:
+    for name, (checks, last_seen) in summary.items():
+        entry = total.get(name)
+        if entry is None:
+            total[name] = [checks, last_seen]
+        else:
+            entry[0] += checks
+            entry[1] = max(entry[1], last_seen)
+
+
+def produce(collection: str, mongo_url: Optional[str], db_name: Optional[str], start: int, count: int,
+            batch_size: int, seed: int, make_batch: Callable, options: dict,
+            summarize: Optional[Callable] = None) -> tuple:
+    """Producer process: insert ``count`` documents numbered from ``start``.
+
+    Returns the number inserted and what ``summarize`` folded out of them.
+    """
+    client, db = connect(mongo_url, db_name)
+    rng = random.Random(seed)
+    inserted = 0
+    summary: dict = {}
+    try:
+        while inserted < count:
+            size = min(batch_size, count - inserted)
+            docs = make_batch(start + inserted, size, rng=rng, **options)
+            if summarize is not None:
+                summarize(docs, summary)
+            db[collection].insert_many(docs, ordered=False, bypass_document_validation=True)
+            inserted += size
+    finally:
+        client.close()
+    return inserted, summary
+
+
+def run_producers(collection: str, count: int, producers: int, batch_size: int, mongo_url, db_name,
+                  make_batch: Callable, options: dict, summarize: Optional[Callable] = None) -> dict:
+    """Insert ``count`` documents from parallel producers; returns their merged summaries"""
+    share = math.ceil(count / producers)
+    started = time.perf_counter()
+    done = 0
+    total: dict = {}
+    with ProcessPoolExecutor(max_workers=producers) as pool:
+        futures = [
+            pool.submit(produce, collection, mongo_url, db_name, p * share, min(share, count - p * share),
+                        batch_size, random.randrange(2 ** 32), make_batch, options, summarize)
+            for p in range(producers) if p * share < count
+        ]
+        for future in as_completed(futures):
+            inserted, summary = future.result()
+            done += inserted
+            merge_summaries(total, summary)
+            elapsed = time.perf_counter() - started
+            typer.echo(f"{collection}: {done:,}/{count:,} inserted ({done / elapsed:,.0f} docs/s)")
+    typer.echo(f"{collection}: {count:,} documents in {time.perf_counter() - started:.1f} s")
+    return total
+
+
+def backfill_heartbeats(db) -> None:
+    """Build client_heartbeats from existing status checks, as the API's startup backfill does"""
+    pipeline = [{"$group": {"_id": "$client_name", "last_seen": {"$max": "$timestamp"}, "checks": {"$sum": 1}}}]
+    operations = [
+        UpdateOne({"client_name": group["_id"]},
+                  {"$max": {"last_seen": group["last_seen"]}, "$set": {"checks": group["checks"]}}, upsert=True)
+        for group in db.status_checks.aggregate(pipeline, allowDiskUse=True)
+    ]
+    if operations:
+        db.client_heartbeats.bulk_write(operations, ordered=False)
+
+
+def upsert_heartbeats(db, summary: Dict[str, list], batch_size: int) -> None:
+    """Add generated check-ins to client_heartbeats the way each API write does"""
+    operations = [
+        UpdateOne({"client_name": name}, {"$max": {"last_seen": last_seen}, "$inc": {"checks": checks}}, upsert=True)
+        for name, (checks, last_seen) in summary.items()
+    ]
+    for start in range(0, len(operations), batch_size):
+        db.client_heartbeats.bulk_write(operations[start:start + batch_size], ordered=False)
+    typer.echo(f"client_heartbeats: {len(operations):,} clients updated")
+
+
+def check_shape(model, doc: dict) -> None:
+    """Fail fast if the generated documents no longer match the API model"""
+    model(**{k: v for k, v in doc.items() if k != "password_hash"})
+
+
+@app.command()
+def users(
+    count: int = typer.Option(100000, help="users to insert"),
+    producers: int = typer.Option(os.cpu_count() or 4, help="parallel producer processes"),
+    batch_size: int = typer.Option(10000, help="documents per insert_many"),
+    passwords: int = typer.Option(16, help="distinct passwords; their hashes are computed once up front"),
+    bcrypt_rounds: int = typer.Option(12, help="bcrypt cost of the precomputed hashes"),
+    days: int = typer.Option(365, help="spread created_at over this many days"),
+    admin_ratio: float = typer.Option(0.001, help="fraction of users with the admin role"),
+    inactive_ratio: float = typer.Option(0.05, help="fraction of inactive users"),
+    drop: bool = typer.Option(False, help="drop the users collection first"),
+    mongo_url: Optional[str] = MongoUrl,
+    db_name: Optional[str] = DbName,
+):
+    """Insert users shaped like the User model. Passwords are Generated<N>! for N = user number % --passwords."""
+    client, db = connect(mongo_url, db_name)
+    if drop:
+        db.users.drop()
+    client.close()
+    options = {
+        "run_id": uuid.uuid4().hex[:8],
+        "passwords": hash_passwords(passwords, bcrypt_rounds),
+        "days": days,
+        "admin_ratio": admin_ratio,
+        "inactive_ratio": inactive_ratio,
+    }
+    check_shape(User, user_batch(0, 1, rng=random.Random(), **options)[0])
+    run_producers("users", count, producers, batch_size, mongo_url, db_name, user_batch, options)
+
+
+@app.command("status-checks")
+def status_checks(
+    count: int = typer.Option(1000000, help="status checks to insert"),
+    clients: int = typer.Option(1000, help="distinct client_name values"),
+    client_skew: float = typer.Option(1.0, help="Zipf exponent of client popularity; 0 for uniform"),
+    days: int = typer.Option(30, help="spread timestamps over this many days before now"),
+    time_skew: float = typer.Option(1.0, help="above 1 crowds timestamps towards now; 1 is uniform"),
+    producers: int = typer.Option(os.cpu_count() or 4, help="parallel producer processes"),
+    batch_size: int = typer.Option(10000, help="documents per insert_many"),
+    drop: bool = typer.Option(False, help="drop the status_checks collection first"),
+    mongo_url: Optional[str] = MongoUrl,
+    db_name: Optional[str] = DbName,
+):
+    """Insert status checks from a fixed set of clients.
+
+    client_heartbeats is kept consistent with them: each client's generated
+    count and latest timestamp are upserted into it, as API writes do.
+    """
+    client, db = connect(mongo_url, db_name)
+    if drop:
+        db.status_checks.drop()
+        db.client_heartbeats.delete_many({})
+    elif db.client_heartbeats.find_one({}, {"_id": 1}) is None and db.status_checks.find_one({}, {"_id": 1}):
+        # Existing checks the API has not backfilled yet; the upsert below
+        # would make the table non-empty and stop the API from doing it
+        backfill_heartbeats(db)
+    weights = client_weights(clients, client_skew)
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    options = {
+        "client_names": [f"client-{k}" for k in range(clients)],
+        "cumulative_weights": cumulative,
+        "days": days,
+        "time_skew": time_skew,
+    }
+    check_shape(StatusCheck, status_check_batch(0, 1, rng=random.Random(), **options)[0])
+    summary = run_producers("status_checks", count, producers, batch_size, mongo_url, db_name,
+                            status_check_batch, options, summarize=summarize_heartbeats)
+    upsert_heartbeats(db, summary, batch_size)
+    client.close()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+
+from .metrics import DB_CALLS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+DB_CALLS_HEADER = b"x-db-calls"
+DB_TIME_HEADER = b"x-db-time"
+
+# Where each command keeps the filter worth logging
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+}
+BULK_FIELDS = {"update": "updates", "delete": "deletes"}
+
+
+class RequestProfile:
+    """MongoDB commands issued while handling one request"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.calls = 0
+        self.duration = 0.0
+        # Commands of one request may run in several Motor executor threads at once
+        self._lock = threading.Lock()
+
+    def add(self, duration: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.duration += duration
+
+
+request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def query_shape(value: Any) -> Any:
+    """Replace the values in a filter or pipeline with "?", keeping its structure"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in lists and the like collapse to one element; pipelines keep every stage
+        if value and all(isinstance(item, dict) for item in value):
+            return [query_shape(item) for item in value]
+        return [query_shape(value[0])] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Any:
+    if command_name in FILTER_FIELDS:
+        return query_shape(command.get(FILTER_FIELDS[command_name], {}))
+    if command_name in BULK_FIELDS:
+        statements = command.get(BULK_FIELDS[command_name]) or [{}]
+        return query_shape(statements[0].get("q", {}))
+    return None
+
+
+class CommandProfiler(monitoring.CommandListener):
+    """Attributes MongoDB commands to the current request and logs slow ones.
+
+    Motor runs commands in executor threads with a copy of the caller's
+    context, so ``request_profile`` still points at the request's profile
+    when pymongo publishes the events.
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self._pending: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        if self.slow_query_ms > 0:
+            # Only a reference is kept; the shape is built for slow commands only
+            self._pending[(event.connection_id, event.request_id)] = (event.command_name, event.command)
+
+    def _finished(self, event, failed: bool) -> None:
+        duration = event.duration_micros / 1e6
+        profile = request_profile.get()
+        if profile is not None:
+            profile.add(duration)
+        started = self._pending.pop((event.connection_id, event.request_id), None)
+        if started is None or duration * 1000 < self.slow_query_ms:
+            return
+        command_name, command = started
+        collection = command.get(command_name)
+        logger.warning(
+            "Slow MongoDB %s on %s took %.1f ms%s (request %s): %s",
+            command_name,
+            collection if isinstance(collection, str) else "-",
+            duration * 1000,
+            " and failed" if failed else "",
+            profile.path if profile is not None else "-",
+            json.dumps(command_shape(command_name, command), default=str),
+        )
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+
+command_profiler = CommandProfiler(slow_query_ms=float(os.environ.get("DB_SLOW_QUERY_MS", "100")))
+
+
+class DBProfilerMiddleware:
+    """Count MongoDB commands per request.
+
+    The count is recorded per route template and, with ``headers`` enabled,
+    returned as X-DB-Calls and X-DB-Time (milliseconds) for debugging. The
+    headers only cover commands issued before the response starts.
+    """
+
+    def __init__(self, app, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = RequestProfile(scope["path"])
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (DB_CALLS_HEADER, str(profile.calls).encode()),
+                    (DB_TIME_HEADER, f"{profile.duration * 1000:.1f}".encode()),
+                ]}
+            await send(message)
+
+        token = request_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_headers if self.headers else send)
+        finally:
+            request_profile.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                DB_CALLS_PER_REQUEST.labels(route.path).observe(profile.calls)
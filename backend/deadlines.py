@@ -0,0 +1,103 @@
+import asyncio
+import contextvars
+import os
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import pymongo
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pymongo.errors import PyMongoError
+
+REQUEST_TIMEOUT_HEADER = "x-request-timeout-ms"
+BOOKKEEPING_TIMEOUT_SECONDS = float(os.environ.get("REQUEST_DEADLINE_BOOKKEEPING_MS", "5000")) / 1000
+
+T = TypeVar("T")
+
+
+def parse_route_deadlines(value: str) -> Dict[str, int]:
+    """Parse "prefix=ms,prefix=ms" into a dict; 0 disables the deadline"""
+    routes = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            prefix, ms = entry.split("=", 1)
+            routes[prefix.strip()] = int(ms)
+    return routes
+
+
+async def outside_deadline(operation: Callable[[], Awaitable[T]],
+                           timeout: float = BOOKKEEPING_TIMEOUT_SECONDS) -> T:
+    """Run ``operation`` free of the request's deadline, bounded by ``timeout``.
+
+    For writes that must land even when the request ran out of time, such as
+    releasing an idempotency key. ``pymongo.timeout`` can only shorten an
+    enclosing deadline, so the operation runs in a task started from an empty
+    context; the task is shielded so a cancelled request does not abandon it.
+    """
+    async def bounded():
+        with pymongo.timeout(timeout):
+            return await operation()
+
+    return await asyncio.shield(asyncio.create_task(bounded(), context=contextvars.Context()))
+
+
+class DeadlineMiddleware:
+    """Give every HTTP request a latency budget and apply it to MongoDB.
+
+    The budget comes from the longest matching path prefix in ``routes``
+    (falling back to ``default_ms``) and can be overridden by the
+    X-Request-Timeout-Ms header, clamped to ``[min_ms, max_ms]``. It is
+    applied with ``pymongo.timeout``, which Motor carries into its executor
+    threads, so every operation is sent with the remaining time as maxTimeMS
+    and pool checkouts give up when the budget is spent.
+    """
+
+    def __init__(self, app, default_ms: int = 10000, routes: Optional[Dict[str, int]] = None,
+                 min_ms: int = 50, max_ms: int = 30000):
+        self.app = app
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        # Longest prefix first so the most specific route wins
+        self.routes = sorted((routes or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def budget_ms(self, scope) -> int:
+        for name, value in scope["headers"]:
+            if name == REQUEST_TIMEOUT_HEADER.encode():
+                try:
+                    return min(max(int(value), self.min_ms), self.max_ms)
+                except ValueError:
+                    break
+        path = scope["path"]
+        for prefix, ms in self.routes:
+            if path.startswith(prefix):
+                return ms
+        return self.default_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        budget_ms = self.budget_ms(scope)
+        if budget_ms <= 0:
+            return await self.app(scope, receive, send)
+
+        with pymongo.timeout(budget_ms / 1000):
+            await self.app(scope, receive, send)
+
+
+async def mongo_timeout_handler(request: Request, exc: PyMongoError):
+    """Answer 504 when a MongoDB operation ran out of time"""
+    if not exc.timeout:
+        raise exc
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
+
+def deadline_middleware_options() -> dict:
+    """DeadlineMiddleware settings from the environment"""
+    return {
+        "default_ms": int(os.environ.get("REQUEST_DEADLINE_MS", "10000")),
+        "routes": parse_route_deadlines(os.environ.get(
+            "REQUEST_DEADLINE_ROUTES", "/api/status/export=0,/api/status/stream=0"
+        )),
+        "min_ms": int(os.environ.get("REQUEST_DEADLINE_MIN_MS", "50")),
+        "max_ms": int(os.environ.get("REQUEST_DEADLINE_MAX_MS", "30000")),
+    }
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+# pandas and pyarrow are imported inside the functions that need them so that
+# they are only loaded by workers that actually serve an export.
+
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+EXPORT_BATCH_SIZE = 50000
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _status_check_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("client_name", pa.dictionary(pa.int32(), pa.string())),
+        ("timestamp", pa.timestamp("us")),
+    ])
+
+
+def _build_record_batch(docs: List[dict], schema):
+    """Turn a batch of status check documents into one columnar record batch"""
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+    frame = pd.DataFrame({
+        "id": [doc["id"] for doc in docs],
+        "client_name": pd.Categorical([doc["client_name"] for doc in docs]),
+        "timestamp": np.array([doc["timestamp"] for doc in docs], dtype="datetime64[us]"),
+    })
+    return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def _open_writer(fmt: str, sink: _ChunkSink, schema):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+def _write_batch(writer, fmt: str, batch) -> None:
+    if fmt == "parquet":
+        # One row group per batch keeps memory bounded while streaming
+        writer.write_batch(batch, row_group_size=batch.num_rows)
+    else:
+        writer.write_batch(batch)
+
+
+async def export_status_checks(
+    db,
+    fmt: str = "parquet",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """Stream status checks in ``[start, end)`` as a Parquet or Arrow IPC file.
+
+    The cursor is read ``batch_size`` documents at a time and each batch is
+    converted to columns off the event loop, so memory stays proportional to
+    one batch regardless of the export size.
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    query = {}
+    if start is not None or end is not None:
+        query["timestamp"] = {}
+        if start is not None:
+            query["timestamp"]["$gte"] = start
+        if end is not None:
+            query["timestamp"]["$lt"] = end
+
+    schema = _status_check_schema()
+    sink = _ChunkSink()
+    writer = _open_writer(fmt, sink, schema)
+    cursor = db.status_checks.find(
+        query, {"_id": 0, "id": 1, "client_name": 1, "timestamp": 1}, batch_size=batch_size
+    )
+    try:
+        while True:
+            docs = await cursor.to_list(length=batch_size)
+            if not docs:
+                break
+            batch = await asyncio.to_thread(_build_record_batch, docs, schema)
+            await asyncio.to_thread(_write_batch, writer, fmt, batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+        await cursor.close()
+    yield sink.drain()
@@ -0,0 +1,110 @@
+# Gunicorn settings for running the API with several uvicorn worker processes:
+#
+#     gunicorn -c backend/gunicorn.conf.py backend.server:app
+#
+# Run from the repository root, the directory containing the backend package.
+#
+# Per-process state and how it behaves across workers:
+# - MongoDB client: created in the lifespan handler, i.e. after fork, per worker.
+# - Rate limits: shared only when RATE_LIMIT_STORAGE_URI points at Redis.
+# - Status stream hub (/api/status/stream, /api/ws/status): subscribers only see
+#   inserts made by their own worker unless STATUS_STREAM_CHANGE_STREAM=true.
+# - Status listing cache: invalidated by local writes and bounded by
+#   STATUS_CACHE_MAX_STALENESS; with STATUS_STREAM_CHANGE_STREAM=true every
+#   worker also invalidates on inserts made by the others.
+# - Heartbeat mirror: reloaded from client_heartbeats every HEARTBEAT_REFRESH_SECONDS.
+# - Idempotency keys: stored in MongoDB; the in-memory LRU only holds completed responses.
+# - Index reconciliation: done by the worker holding MONGO_INDEX_LOCK_FILE.
+# - Prometheus metrics: aggregated across workers through PROMETHEUS_MULTIPROC_DIR
+#   (default /tmp/prometheus with several workers; cleared on start, dead workers
+#   marked on exit).
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+if os.environ.get("PERF_PROFILE", "default").lower() == "fast":
+    worker_class = "backend.uvicorn_workers.FastUvicornWorker"
+else:
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+# backend.metrics picks the multiprocess mode at import, so this has to be set
+# before the app is preloaded; without it /metrics reports a random worker
+if workers > 1:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus")
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Recycle workers after a number of requests (jittered so they do not all restart together)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Graceful drain: in-flight requests get this long to finish on SIGTERM or recycle
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle a worker whose resident memory grows past this many MB (0 disables)
+max_worker_memory_mb = int(os.environ.get("GUNICORN_MAX_WORKER_MEMORY_MB", "0"))
+memory_check_interval = 10
+
+
+def _resident_memory_mb() -> float:
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _watch_memory(worker):
+    while True:
+        time.sleep(memory_check_interval)
+        rss_mb = _resident_memory_mb()
+        if rss_mb > max_worker_memory_mb:
+            worker.log.warning(
+                "Worker %s using %.0f MB (limit %s MB), recycling", worker.pid, rss_mb, max_worker_memory_mb
+            )
+            # SIGTERM makes the worker drain gracefully; the master starts a replacement
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+def post_worker_init(worker):
+    if max_worker_memory_mb > 0 and os.path.exists("/proc/self/statm"):
+        threading.Thread(target=_watch_memory, args=(worker,), daemon=True).start()
+
+
+def _warn_about_per_worker_state(server):
+    if workers <= 1:
+        return
+    if os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://").startswith("memory://"):
+        server.log.warning(
+            "Rate limits are kept in memory by each of the %s workers, so clients get up to %sx the "
+            "configured limit; set RATE_LIMIT_STORAGE_URI to a Redis URI to share them", workers, workers
+        )
+    if os.environ.get("STATUS_STREAM_CHANGE_STREAM", "false").lower() != "true":
+        server.log.warning(
+            "STATUS_STREAM_CHANGE_STREAM is off: status stream subscribers only see inserts made by "
+            "their own worker and other workers' heartbeats lag by HEARTBEAT_REFRESH_SECONDS"
+        )
+
+
+def on_starting(server):
+    _warn_about_per_worker_state(server)
+    # Samples left over from a previous master would be summed into /metrics
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith(".db"):
+                os.remove(os.path.join(multiproc_dir, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
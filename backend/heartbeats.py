@@ -0,0 +1,107 @@
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+class LastSeenIndex:
+    """Per-worker mirror of the ``client_heartbeats`` collection.
+
+    ``client_heartbeats`` holds one document per client with the time of its
+    latest status check, so "who went silent?" is answered from O(clients)
+    entries instead of aggregating over every status check. Local writes update
+    the mirror immediately; writes made by other workers are picked up by
+    reloading the collection at most every ``refresh_interval`` seconds.
+
+    Set ``mirror_writes`` to False when every insert, local ones included, is
+    passed to ``observe`` from a change stream, so none is counted twice.
+    """
+
+    def __init__(self, refresh_interval: float = 30.0, mirror_writes: bool = True):
+        self.refresh_interval = refresh_interval
+        self.mirror_writes = mirror_writes
+        self.last_seen: Dict[str, datetime] = {}
+        self.checks: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def record(self, db, client_name: str, timestamp: datetime) -> None:
+        """Persist and mirror a check-in from ``client_name``"""
+        await db.client_heartbeats.update_one(
+            {"client_name": client_name},
+            {"$max": {"last_seen": timestamp}, "$inc": {"checks": 1}},
+            upsert=True
+        )
+        if self.mirror_writes:
+            self.observe(client_name, timestamp)
+
+    def observe(self, client_name: str, timestamp: datetime) -> None:
+        """Update the mirror only, for check-ins persisted by another worker"""
+        previous = self.last_seen.get(client_name)
+        if previous is None or timestamp > previous:
+            self.last_seen[client_name] = timestamp
+        self.checks[client_name] = self.checks.get(client_name, 0) + 1
+
+    async def load(self, db) -> None:
+        """Replace the mirror with the contents of the collection"""
+        last_seen: Dict[str, datetime] = {}
+        checks: Dict[str, int] = {}
+        async for doc in db.client_heartbeats.find({}, {"_id": 0}):
+            last_seen[doc["client_name"]] = doc["last_seen"]
+            checks[doc["client_name"]] = doc.get("checks", 0)
+        self.last_seen = last_seen
+        self.checks = checks
+        self._loaded_at = time.monotonic()
+
+    async def refresh_if_due(self, db) -> None:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            await self.load(db)
+
+    async def backfill(self, db) -> int:
+        """Build ``client_heartbeats`` from ``status_checks`` if it is empty.
+
+        This is the one full aggregation; afterwards the table is maintained on
+        every write. Returns the number of clients written.
+        """
+        if await db.client_heartbeats.find_one({}, {"_id": 1}) is not None:
+            return 0
+        pipeline = [{
+            "$group": {
+                "_id": "$client_name",
+                "last_seen": {"$max": "$timestamp"},
+                "checks": {"$sum": 1}
+            }
+        }]
+        operations = []
+        async for group in db.status_checks.aggregate(pipeline, allowDiskUse=True):
+            operations.append(UpdateOne(
+                {"client_name": group["_id"]},
+                {"$max": {"last_seen": group["last_seen"]}, "$set": {"checks": group["checks"]}},
+                upsert=True
+            ))
+        if operations:
+            await db.client_heartbeats.bulk_write(operations, ordered=False)
+            logger.info(f"Backfilled heartbeats for {len(operations)} clients")
+        return len(operations)
+
+    def _entry(self, client_name: str) -> dict:
+        return {
+            "client_name": client_name,
+            "last_seen": self.last_seen[client_name],
+            "checks": self.checks.get(client_name, 0)
+        }
+
+    def clients(self) -> List[dict]:
+        """All clients, most recently seen first"""
+        names = sorted(self.last_seen, key=self.last_seen.__getitem__, reverse=True)
+        return [self._entry(name) for name in names]
+
+    def stale(self, older_than: timedelta, now: Optional[datetime] = None) -> List[dict]:
+        """Clients whose last check-in is older than ``older_than``, longest silent first"""
+        cutoff = (now or datetime.utcnow()) - older_than
+        names = [name for name, seen in self.last_seen.items() if seen < cutoff]
+        names.sort(key=self.last_seen.__getitem__)
+        return [self._entry(name) for name in names]
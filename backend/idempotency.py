@@ -0,0 +1,196 @@
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Header, HTTPException, Response, status
+from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
+
+from .auth import SECRET_KEY
+from .deadlines import outside_deadline
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    body: bytes
+    expires_at: float
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+
+class IdempotencyStore:
+    """Stores the first response for each Idempotency-Key and replays it on retries.
+
+    Records live in the ``idempotency_keys`` collection (expired by a TTL index
+    on ``created_at``) with a small per-worker LRU in front. A key whose first
+    request is still running answers 409; reusing a key with a different
+    payload answers 422. A request whose handler fails releases its key so it
+    can be retried; side effects that must not be repeated by that retry once
+    the handler's write has committed go in ``after``.
+    """
+
+    def __init__(self, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 front_cache_size: int = 10000, lease_seconds: int = 60):
+        self.ttl_seconds = ttl_seconds
+        self.front_cache_size = front_cache_size
+        self.lease_seconds = lease_seconds
+        self._front: "OrderedDict[str, StoredResponse]" = OrderedDict()
+
+    @staticmethod
+    def fingerprint(payload: BaseModel) -> str:
+        # Keyed so that request bodies containing passwords are not stored as plain digests
+        return hmac.new(SECRET_KEY.encode(), payload.model_dump_json().encode(), hashlib.sha256).hexdigest()
+
+    def _remember(self, record_id: str, stored: StoredResponse) -> None:
+        self._front[record_id] = stored
+        self._front.move_to_end(record_id)
+        while len(self._front) > self.front_cache_size:
+            self._front.popitem(last=False)
+
+    def _lookup_front(self, record_id: str) -> Optional[StoredResponse]:
+        stored = self._front.get(record_id)
+        if stored is None:
+            return None
+        if stored.expires_at < time.monotonic():
+            del self._front[record_id]
+            return None
+        self._front.move_to_end(record_id)
+        return stored
+
+    @staticmethod
+    def _check_fingerprint(stored_fingerprint: str, fingerprint: str) -> None:
+        if not hmac.compare_digest(stored_fingerprint, fingerprint):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+    async def _claim(self, db, record_id: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Claim ``record_id`` for this request, or return the stored response"""
+        now = datetime.utcnow()
+        try:
+            await db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "state": "in_progress",
+                "created_at": now
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        record = await db.idempotency_keys.find_one({"_id": record_id})
+        if record is None:
+            # Expired between the insert and the read; treat as a fresh key
+            return await self._claim(db, record_id, fingerprint)
+        self._check_fingerprint(record["fingerprint"], fingerprint)
+
+        if record["state"] == "completed":
+            stored = StoredResponse(
+                fingerprint=record["fingerprint"],
+                status_code=record["status_code"],
+                body=record["body"],
+                expires_at=time.monotonic() + self.ttl_seconds - (now - record["created_at"]).total_seconds()
+            )
+            self._remember(record_id, stored)
+            return stored
+
+        # Take over a claim left behind by a request that never finished
+        result = await db.idempotency_keys.update_one(
+            {
+                "_id": record_id,
+                "state": "in_progress",
+                "created_at": {"$lt": now - timedelta(seconds=self.lease_seconds)}
+            },
+            {"$set": {"created_at": now}}
+        )
+        if result.modified_count == 1:
+            return None
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is already in progress"
+        )
+
+    async def run(
+        self,
+        db,
+        scope: str,
+        key: Optional[str],
+        payload: BaseModel,
+        handler: Callable[[], Awaitable[BaseModel]],
+        status_code: int = status.HTTP_200_OK,
+        after: Optional[Callable[[BaseModel], Awaitable[None]]] = None
+    ):
+        """Run ``handler`` at most once per ``(scope, key)``.
+
+        ``after`` runs with the handler's result once the key is marked
+        completed, and not on replays; if it fails the key is kept, so a retry
+        replays the response instead of running the handler again. Without a
+        key the handler's result is returned untouched.
+        """
+        if key is None:
+            result = await handler()
+            if after is not None:
+                await after(result)
+            return result
+
+        record_id = f"{scope}:{key}"
+        fingerprint = self.fingerprint(payload)
+        stored = self._lookup_front(record_id)
+        if stored is not None:
+            self._check_fingerprint(stored.fingerprint, fingerprint)
+            return stored.to_response()
+        stored = await self._claim(db, record_id, fingerprint)
+        if stored is not None:
+            return stored.to_response()
+
+        try:
+            result = await handler()
+        except BaseException:
+            # Released even when the request's deadline is spent, so a retry is not
+            # answered 409 until the lease runs out
+            await outside_deadline(
+                lambda: db.idempotency_keys.delete_one({"_id": record_id, "state": "in_progress"})
+            )
+            raise
+
+        body = result.model_dump_json().encode()
+        await outside_deadline(lambda: db.idempotency_keys.update_one(
+            {"_id": record_id},
+            {"$set": {"state": "completed", "status_code": status_code, "body": body}}
+        ))
+        self._remember(record_id, StoredResponse(
+            fingerprint=fingerprint,
+            status_code=status_code,
+            body=body,
+            expires_at=time.monotonic() + self.ttl_seconds
+        ))
+        if after is not None:
+            await after(result)
+        return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+idempotency_store = IdempotencyStore()
+
+
+async def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER, max_length=255)
+) -> Optional[str]:
+    """Optional Idempotency-Key request header"""
+    return idempotency_key
@@ -0,0 +1,239 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from .metrics import LOG_RECORDS_DROPPED
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client supplied ids are kept only if they look like ids
+VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._:-]{1,128}$")
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Standard LogRecord attributes; anything else passed via ``extra`` is emitted as a field
+RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdMiddleware:
+    """Tag each request with an id (from X-Request-ID or generated) for logs and the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        value = None
+        for name, header in scope["headers"]:
+            if name == REQUEST_ID_HEADER and VALID_REQUEST_ID.match(header):
+                value = header.decode()
+                break
+        if value is None:
+            value = uuid.uuid4().hex
+        encoded = value.encode()
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (REQUEST_ID_HEADER, encoded)]}
+            await send(message)
+
+        token = request_id.set(value)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Copy the current request id onto the record while still on the emitting thread"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+def _logger_settings(value: str) -> Dict[str, float]:
+    """Parse "logger=number,logger=number" settings"""
+    settings = {}
+    for entry in value.split(","):
+        if "=" in entry:
+            name, number = entry.split("=", 1)
+            settings[name.strip()] = float(number)
+    return settings
+
+
+class SamplingFilter(logging.Filter):
+    """Sample and rate-cap records below WARNING, per logger.
+
+    ``sample_rates`` keeps that fraction of a logger's records and
+    ``rate_limits`` caps them per second. Keys match the logger name or its
+    trailing components, so "routes.auth" also matches "backend.routes.auth".
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None,
+                 rate_limits: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limits = rate_limits or {}
+        self._settings: Dict[str, tuple] = {}
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, name: str) -> tuple:
+        settings = self._settings.get(name)
+        if settings is None:
+            def match(table):
+                for key, value in table.items():
+                    if name == key or name.endswith("." + key):
+                        return value
+                return None
+            settings = self._settings[name] = (match(self.sample_rates), match(self.rate_limits))
+        return settings
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        sample_rate, rate_limit = self._lookup(record.name)
+        if sample_rate is not None and random.random() >= sample_rate:
+            LOG_RECORDS_DROPPED.labels("sampled").inc()
+            return False
+        if rate_limit is not None:
+            now = int(time.monotonic())
+            with self._lock:
+                window = self._windows.setdefault(record.name, [now, 0])
+                if window[0] != now:
+                    window[0], window[1] = now, 0
+                window[1] += 1
+                allowed = window[1] <= rate_limit
+            if not allowed:
+                LOG_RECORDS_DROPPED.labels("rate_limited").inc()
+                return False
+        return True
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to a listener thread through a bounded queue.
+
+    Emitting never blocks: when the queue is full the record is dropped and
+    counted. The listener thread is (re)started in whichever process first
+    logs, so it also works after gunicorn forks preloaded workers.
+    """
+
+    def __init__(self, target: logging.Handler, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A listener inherited through fork has no thread in this process
+            self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = _Listener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Merge args now so later changes to them cannot alter the message;
+        # formatting, including tracebacks, is left to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+    def stop(self) -> None:
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with timestamp, level, logger, request id and extra fields"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+
+def configure_logging() -> BoundedQueueHandler:
+    """Route all logging through a bounded queue to a stderr writer thread.
+
+    LOG_LEVEL sets the root level, LOG_FORMAT is "json" or "text",
+    LOG_QUEUE_SIZE bounds the queue, and LOG_SAMPLE_RATES / LOG_RATE_LIMITS
+    ("logger=value,...") sample or cap info logs of busy loggers. Uvicorn's
+    and gunicorn's loggers are routed through the same queue.
+    """
+    stream = logging.StreamHandler(sys.stderr)
+    if os.environ.get("LOG_FORMAT", "json").lower() == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = BoundedQueueHandler(stream, maxsize=int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(
+        sample_rates=_logger_settings(os.environ.get("LOG_SAMPLE_RATES", "")),
+        rate_limits=_logger_settings(os.environ.get("LOG_RATE_LIMITS", "routes.auth=50,routes.users=50"))
+    ))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        if isinstance(existing, BoundedQueueHandler):
+            existing.stop()
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers.clear()
+        server_logger.propagate = True
+
+    atexit.register(handler.stop)
+    return handler
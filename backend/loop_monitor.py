@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from .metrics import EVENT_LOOP_BLOCKED, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+
+def find_route(frame) -> str:
+    """Route of the request a stack is serving, from the innermost ASGI ``scope`` local"""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            route = scope.get("route")
+            return route.path if route is not None else scope.get("path", "-")
+        frame = frame.f_back
+    return "-"
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports callbacks that block the loop.
+
+    A task on the loop sleeps for ``interval`` and records how late it woke
+    up. A watchdog thread checks that the task keeps waking; when it has
+    been stuck for more than ``block_threshold`` the loop thread's current
+    stack is logged once per stall, with the route found in its frames.
+    """
+
+    def __init__(self, interval: float = 0.1, block_threshold: float = 0.1):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.stalls = 0
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._probe())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_tick = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(0.0, self._last_tick - started - self.interval))
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            tick = self._last_tick
+            stalled_for = time.monotonic() - tick - self.interval
+            if stalled_for > self.block_threshold and tick != reported_tick:
+                reported_tick = tick
+                self._report(stalled_for)
+
+    def _report(self, stalled_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        route = find_route(frame)
+        self.stalls += 1
+        EVENT_LOOP_BLOCKED.labels(route).inc()
+        logger.warning(
+            "Event loop blocked for over %.0f ms (route %s):\n%s",
+            stalled_for * 1000, route, "".join(traceback.format_stack(frame))
+        )
+
+
+def create_loop_monitor() -> Optional[LoopMonitor]:
+    """Monitor configured from LOOP_MONITOR_* variables, or None when disabled"""
+    if os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() != "true":
+        return None
+    return LoopMonitor(
+        interval=float(os.environ.get("LOOP_MONITOR_INTERVAL_MS", "100")) / 1000,
+        block_threshold=float(os.environ.get("LOOP_MONITOR_BLOCK_THRESHOLD_MS", "100")) / 1000
+    )
@@ -0,0 +1,198 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from pymongo import monitoring
+from starlette.routing import Match
+
+# With PROMETHEUS_MULTIPROC_DIR set (before this module is imported), every
+# worker writes its samples to that directory and /metrics aggregates them.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ["method", "route"],
+    multiprocess_mode="livesum"
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "collection"],
+    buckets=LATENCY_BUCKETS
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands", ["command", "collection"]
+)
+MONGO_POOL_CHECKOUT_LATENCY = Histogram(
+    "mongo_pool_checkout_duration_seconds", "Time to check a connection out of the pool",
+    buckets=LATENCY_BUCKETS
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total", "Failed pool checkouts", ["reason"]
+)
+MONGO_POOL_WAITING = Gauge(
+    "mongo_pool_waiting", "Operations waiting for a pooled connection", multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out", "Pooled connections in use", multiprocess_mode="livesum"
+)
+DB_CALLS_PER_REQUEST = Histogram(
+    "http_request_db_calls", "MongoDB commands issued per HTTP request", ["route"],
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32, 64)
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer scheduled to fire",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total", "Callbacks that blocked the event loop past the threshold", ["route"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Log records dropped by sampling, rate caps or a full queue", ["reason"]
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"]
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ["route"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total", "Requests shed by admission control", ["lane"]
+)
+
+UNMATCHED_ROUTE = "unmatched"
+# Anything else is recorded as "OTHER" so clients cannot create new series
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Feeds MongoDB command latency into Prometheus"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._pending[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def _labels(self, event):
+        return event.command_name, self._pending.pop(event.request_id, "")
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.labels(*self._labels(event)).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        labels = self._labels(event)
+        MONGO_COMMAND_LATENCY.labels(*labels).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(*labels).inc()
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+class RouteResolver:
+    """Maps request paths to route templates, remembering recent paths"""
+
+    def __init__(self, app, max_entries: int = 10000):
+        self.app = app
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def __call__(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._cache.get(key)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            for route in self.app.router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = route.path
+                    break
+            self._cache[key] = template
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return template
+
+
+class MetricsMiddleware:
+    """Records request count, latency and in-flight requests per route template"""
+
+    def __init__(self, app, resolver: RouteResolver):
+        self.app = app
+        self.resolver = resolver
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        route = self.resolver(scope)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = _route_metrics(method, route)[0]
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            record_request(method, route, status_code, time.perf_counter() - started)
+            in_flight.dec()
+
+
+# labels() takes a lock and builds a key on every call, so the children for
+# each (method, route) are looked up once and kept here. Routes come from
+# the app's route table, which keeps this bounded.
+_children: Dict[Tuple[str, str], tuple] = {}
+
+
+def _route_metrics(method: str, route: str) -> tuple:
+    children = _children.get((method, route))
+    if children is None:
+        children = _children[(method, route)] = (
+            HTTP_IN_FLIGHT.labels(method, route), HTTP_LATENCY.labels(method, route), {}
+        )
+    return children
+
+
+def record_request(method: str, route: str, status_code: int, duration: float) -> None:
+    _, latency, counters = _route_metrics(method, route)
+    counter = counters.get(status_code)
+    if counter is None:
+        counter = counters[status_code] = HTTP_REQUESTS.labels(method, route, str(status_code))
+    counter.inc()
+    latency.observe(duration)
+
+
+def metrics_response(registry: Optional[CollectorRegistry] = None) -> Response:
+    """Render all metrics, aggregated across workers in multiprocess mode"""
+    if registry is None:
+        if MULTIPROCESS:
+            from prometheus_client import multiprocess
+
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -50,3 +50,8 @@ class StatusCheck(BaseModel):
 
 class StatusCheckCreate(BaseModel):
     client_name: str
+
+class ClientHeartbeat(BaseModel):
+    client_name: str
+    last_seen: datetime
+    checks: int = 0
@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Dict
+
+from pymongo import monitoring
+
+from .metrics import (
+    MONGO_POOL_CHECKED_OUT,
+    MONGO_POOL_CHECKOUT_FAILURES,
+    MONGO_POOL_CHECKOUT_LATENCY,
+    MONGO_POOL_WAITING,
+)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by pymongo's CMAP events.
+
+    pymongo publishes these events from Motor's executor threads, so every
+    update happens under a lock. The checkout start time is kept per thread
+    because a checkout starts and finishes on the same thread. Checkout
+    latency is recorded only in the Prometheus histogram, which ``snapshot``
+    reads back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.waiting = 0
+        self.max_waiting = 0
+        self.pool_clears = 0
+        self.checkout_latency_max = 0.0
+
+    @property
+    def connections_open(self) -> int:
+        return self.connections_created - self.connections_closed
+
+    @property
+    def checked_out(self) -> int:
+        return self.checkouts - self.checkins
+
+    def _checkout_finished(self) -> float:
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        self.waiting -= 1
+        MONGO_POOL_WAITING.dec()
+        return 0.0 if started is None else time.perf_counter() - started
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.perf_counter()
+        MONGO_POOL_WAITING.inc()
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._checkout_finished()
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+        MONGO_POOL_CHECKOUT_FAILURES.labels(event.reason).inc()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            latency = self._checkout_finished()
+            self.checkouts += 1
+            self.checkout_latency_max = max(self.checkout_latency_max, latency)
+        MONGO_POOL_CHECKOUT_LATENCY.observe(latency)
+        MONGO_POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checkins += 1
+        MONGO_POOL_CHECKED_OUT.dec()
+
+    def snapshot(self) -> dict:
+        """Current counters as a JSON-serializable dict"""
+        latency = {"buckets": {}}
+        for metric in MONGO_POOL_CHECKOUT_LATENCY.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_bucket"):
+                    latency["buckets"][sample.labels["le"]] = int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    latency["sum"] = sample.value
+                elif sample.name.endswith("_count"):
+                    latency["count"] = int(sample.value)
+        with self._lock:
+            return {
+                "connections_open": self.connections_open,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "pool_clears": self.pool_clears,
+                "checkout_latency_seconds": {**latency, "max": self.checkout_latency_max},
+            }
+
+
+pool_metrics = PoolMetrics()
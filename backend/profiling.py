@@ -0,0 +1,107 @@
+import asyncio
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfileStore:
+    """Directory of speedscope profiles keeping only the newest ``max_files``"""
+
+    def __init__(self, directory: str, max_files: int = 100):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, route: str, data: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(self.directory, f"{time.time_ns()}-{slug}.speedscope.json")
+        with open(path, "w") as f:
+            f.write(data)
+        self._trim()
+        return path
+
+    def _trim(self) -> None:
+        # Names start with a nanosecond timestamp, so they sort oldest first
+        files = sorted(name for name in os.listdir(self.directory) if name.endswith(".speedscope.json"))
+        for name in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # removed by another worker
+
+
+class ProfilerMiddleware:
+    """Profile a sample of requests, or those sending the X-Profile secret.
+
+    Uses pyinstrument's statistical profiler (imported on first use) and
+    stores each profile as speedscope JSON, named after the route template,
+    in a bounded ``ProfileStore``. At most ``max_concurrent`` requests are
+    profiled at once; the rest run normally. The middleware is only
+    installed when profiling is enabled, so it costs nothing when off.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_rate: float = 0.0,
+                 secret: Optional[str] = None, interval: float = 0.001, max_concurrent: int = 1):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.secret = secret.encode() if secret else None
+        self.interval = interval
+        self.max_concurrent = max_concurrent
+        self.active = 0
+
+    def should_profile(self, scope) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        if self.secret is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.secret)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            return await self.app(scope, receive, send)
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        self.active += 1
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session = profiler.stop()
+            self.active -= 1
+            route = scope.get("route")
+            await asyncio.to_thread(self._save, route.path if route else scope["path"], session)
+
+    def _save(self, route: str, session) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        try:
+            path = self.store.save(route, SpeedscopeRenderer().render(session))
+            logger.info("Saved profile of %s to %s", route, path)
+        except Exception:
+            logger.exception("Failed to save profile of %s", route)
+
+
+def profiler_middleware_options() -> dict:
+    """Settings from PROFILER_* environment variables"""
+    return {
+        "store": ProfileStore(
+            os.environ.get("PROFILER_DIR", "/tmp/profiles"),
+            max_files=int(os.environ.get("PROFILER_MAX_FILES", "100"))
+        ),
+        "sample_rate": float(os.environ.get("PROFILER_SAMPLE_RATE", "0")),
+        "secret": os.environ.get("PROFILER_SECRET") or None,
+        "interval": float(os.environ.get("PROFILER_INTERVAL_MS", "1")) / 1000,
+        "max_concurrent": int(os.environ.get("PROFILER_MAX_CONCURRENT", "1")),
+    }
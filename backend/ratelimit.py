@@ -0,0 +1,209 @@
+import math
+import os
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .metrics import RATE_LIMIT_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA over a stored theoretical arrival time (TAT, ms). Grants up to ARGV[3]
+# tokens at once and returns {granted, retry_after_ms}. Redis' own clock is
+# used so that workers with skewed clocks agree.
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + tonumber(now_parts[2]) / 1000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local available = math.floor((now + interval * burst - tat) / interval)
+local granted = math.min(wanted, available)
+if granted <= 0 then
+    return {0, math.ceil(tat - now - interval * (burst - 1))}
+end
+tat = tat + granted * interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now))
+return {granted, 0}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """Parse "20/minute", "5/second", "100/2 hours" style rates"""
+        count, _, per = value.partition("/")
+        parts = per.strip().split()
+        multiplier = int(parts[0]) if len(parts) == 2 else 1
+        unit = parts[-1].rstrip("s")
+        return cls(limit=int(count), period=multiplier * PERIODS[unit])
+
+    @property
+    def interval_ms(self) -> float:
+        """Time between tokens"""
+        return self.period * 1000 / self.limit
+
+    def __str__(self) -> str:
+        return f"{self.limit} per {self.period:g} seconds"
+
+
+class MemoryGCRA:
+    """Single-process GCRA with the same semantics as the Redis script"""
+
+    def __init__(self):
+        self._tat: Dict[str, float] = {}
+
+    async def acquire(self, key: str, rate: Rate, wanted: int) -> Tuple[int, float]:
+        now = time.monotonic() * 1000
+        interval = rate.interval_ms
+        tat = max(self._tat.get(key, now), now)
+        available = math.floor((now + interval * rate.limit - tat) / interval)
+        granted = min(wanted, available)
+        if granted <= 0:
+            return 0, tat - now - interval * (rate.limit - 1)
+        self._tat[key] = tat + granted * interval
+        return granted, 0.0
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisGCRA:
+    """GCRA shared by every worker through one atomic Lua script per call"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self.redis = redis.from_url(url)
+        self.script = self.redis.register_script(GCRA_SCRIPT)
+
+    async def acquire(self, key: str, rate: Rate, wanted: int) -> Tuple[int, float]:
+        granted, retry_after_ms = await self.script(
+            keys=[self.prefix + key], args=[rate.interval_ms, rate.limit, wanted]
+        )
+        return int(granted), float(retry_after_ms)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class _Reservation:
+    __slots__ = ("tokens", "expires_at", "blocked_until")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """Rate limiter with per-worker token reservations in front of a shared GCRA.
+
+    When a worker runs out of local tokens for a key it takes a batch from the
+    backend in one round trip, so most requests are decided from memory.
+    Reserved tokens are already spent in the shared state, so the limit is
+    never exceeded across workers; unused tokens lapse after ``lease`` seconds.
+    A denial is also remembered locally until its retry time. Batches are
+    ``reserve_fraction`` of the limit, capped at ``max_reserve``, so low
+    limits such as 20/minute reserve one token at a time and stay exact.
+    """
+
+    def __init__(self, backend, enabled: bool = True, reserve_fraction: float = 0.05,
+                 max_reserve: int = 50, lease: float = 1.0, max_keys: int = 100000):
+        self.backend = backend
+        self.enabled = enabled
+        self.reserve_fraction = reserve_fraction
+        self.max_reserve = max_reserve
+        self.lease = lease
+        self.max_keys = max_keys
+        self.rejections = 0
+        self.backend_calls = 0
+        self._reservations: Dict[str, _Reservation] = {}
+
+    def reserve_size(self, rate: Rate) -> int:
+        return max(1, min(self.max_reserve, int(rate.limit * self.reserve_fraction)))
+
+    async def hit(self, key: str, rate: Rate) -> Optional[float]:
+        """Consume one token; return None if allowed, else seconds until retry"""
+        now = time.monotonic()
+        reservation = self._reservations.get(key)
+        if reservation is None:
+            if len(self._reservations) >= self.max_keys:
+                self._reservations.clear()
+            reservation = self._reservations[key] = _Reservation()
+
+        if reservation.tokens > 0 and reservation.expires_at > now:
+            reservation.tokens -= 1
+            return None
+        if reservation.blocked_until > now:
+            self.rejections += 1
+            return reservation.blocked_until - now
+
+        self.backend_calls += 1
+        try:
+            granted, retry_after_ms = await self.backend.acquire(key, rate, self.reserve_size(rate))
+        except Exception as e:
+            # Fail open: an unavailable limiter must not take the API down
+            logger.warning("Rate limit backend unavailable: %s", e)
+            return None
+        if granted == 0:
+            self.rejections += 1
+            reservation.blocked_until = now + retry_after_ms / 1000
+            return retry_after_ms / 1000
+        reservation.tokens = granted - 1
+        reservation.expires_at = now + self.lease
+        return None
+
+    def limit(self, rate: str):
+        """FastAPI dependency enforcing ``rate`` per client address and route"""
+        parsed = Rate.parse(rate)
+
+        async def check_rate_limit(request: Request) -> None:
+            if not self.enabled:
+                return
+            client = request.client.host if request.client else "unknown"
+            retry_after = await self.hit(f"{request.scope['path']}:{client}", parsed)
+            if retry_after is not None:
+                route = request.scope.get("route")
+                RATE_LIMIT_REJECTIONS.labels(route.path if route else request.scope["path"]).inc()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded: {parsed}",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                )
+
+        return check_rate_limit
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Rate limiter configured from RATE_LIMIT_* environment variables.
+
+    RATE_LIMIT_STORAGE_URI selects the backend: "memory://" (per process, the
+    default) or a redis:// URL shared by all workers.
+    """
+    storage_uri = os.environ.get("RATE_LIMIT_STORAGE_URI", "memory://")
+    backend = MemoryGCRA() if storage_uri.startswith("memory://") else RedisGCRA(storage_uri)
+    return RateLimiter(
+        backend,
+        enabled=os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true",
+        reserve_fraction=float(os.environ.get("RATE_LIMIT_RESERVE_FRACTION", "0.05")),
+        max_reserve=int(os.environ.get("RATE_LIMIT_MAX_RESERVE", "50")),
+        lease=float(os.environ.get("RATE_LIMIT_RESERVE_LEASE_SECONDS", "1.0")),
+    )
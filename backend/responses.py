@@ -0,0 +1,33 @@
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# "fast" selects uvloop, httptools and ORJSONModelResponse; "default" keeps stock settings
+PERF_PROFILE = os.environ.get("PERF_PROFILE", "default").lower()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        # by_alias as jsonable_encoder does, so field aliases come out the same
+        return obj.model_dump(by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONModelResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Pydantic models (including nested ones and lists of them) are dumped
+    straight to Python values and encoded by orjson, which handles datetimes,
+    UUIDs and enums natively instead of going through jsonable_encoder.
+    UTC datetimes end in "Z", as pydantic writes them.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z)
+
+
+def default_response_class():
+    return ORJSONModelResponse if PERF_PROFILE == "fast" else JSONResponse
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 from fastapi.security import HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import timedelta, datetime
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import UserCreate, UserLogin, Token, User, UserUpdate
-from auth import AuthManager, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
-from database import get_database
+from ..models import UserCreate, UserLogin, Token, User, UserUpdate
+from ..auth import AuthManager, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user
+from ..database import get_database
+from ..idempotency import idempotency_store, get_idempotency_key
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,9 +17,21 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
-    """Register a new user"""
+    """Register a new user (retry-safe with an Idempotency-Key header)"""
+    return await idempotency_store.run(
+        db,
+        "register",
+        idempotency_key,
+        user_data,
+        lambda: create_user(user_data, db),
+        status_code=status.HTTP_201_CREATED
+    )
+
+async def create_user(user_data: UserCreate, db: AsyncIOMotorDatabase) -> User:
+    """Create a user account, rejecting duplicate emails"""
     # Check if user already exists
     existing_user = await AuthManager.get_user_by_email(db, user_data.email)
     if existing_user:
@@ -46,11 +57,11 @@ async def register_user(
     
     # Insert user into database
     try:
-        result = await db.users.insert_one(user_dict)
-        logger.info(f"User created with ID: {result.inserted_id}")
+        await db.users.insert_one(user_dict)
+        logger.info("User created with ID: %s", user.id)
         return user
     except Exception as e:
-        logger.error(f"Error creating user: {e}")
+        logger.error("Error creating user: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create user"
@@ -101,7 +112,7 @@ async def login_user(
         {"$set": {"last_login": datetime.utcnow()}}
     )
     
-    logger.info(f"User {user.email} logged in successfully")
+    logger.info("User %s logged in successfully", user.id)
     
     return Token(
         access_token=access_token,
@@ -1,26 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pydantic import TypeAdapter
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Optional
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models import User, UserCreate, UserUpdate, UserRole
-from auth import AuthManager, get_current_admin_user
-from database import get_database
+from ..models import User, UserCreate, UserUpdate, UserRole
+from ..auth import AuthManager, get_current_admin_user
+from ..database import get_database, read_database
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/users", tags=["user management"])
 
+user_list_adapter = TypeAdapter(List[User])
+
 @router.get("/", response_model=List[User])
 async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     role: Optional[UserRole] = None,
     current_user: User = Depends(get_current_admin_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(read_database("users.list"))
 ):
     """Get all users (admin only)"""
     # Build query
@@ -38,7 +38,9 @@ async def get_users(
         user_data = {k: v for k, v in user_doc.items() if k != "password_hash"}
         users.append(User(**user_data))
     
-    return users
+    # Serialize directly; the models were just validated, so skip FastAPI's
+    # response_model re-validation and JSON encoding
+    return Response(content=user_list_adapter.dump_json(users), media_type="application/json")
 
 @router.get("/{user_id}", response_model=User)
 async def get_user_by_id(
@@ -140,5 +142,5 @@ async def delete_user_by_id(
             detail="Failed to delete user"
         )
     
-    logger.info(f"User {user_id} deleted by admin {current_user.email}")
+    logger.info("User %s deleted by admin %s", user_id, current_user.id)
     return {"message": "User deleted successfully"}
@@ -1,41 +1,129 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 import os
+import asyncio
 import logging
-import sys
-from pathlib import Path
-from typing import List
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-
-# Add current directory to Python path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional
 
 # Import our modules
-from models import StatusCheck, StatusCheckCreate
-from auth import AuthManager, get_current_active_user
-from database import connect_to_mongo, close_mongo_connection, get_database, create_indexes
-from routes.auth import router as auth_router
-from routes.users import router as users_router
+from .models import StatusCheck, StatusCheckCreate, ClientHeartbeat
+from .cache import ResponseCache
+from .streaming import StatusCheckHub, watch_status_checks
+from .heartbeats import LastSeenIndex
+from .export import EXPORT_MEDIA_TYPES, export_status_checks
+from .ratelimit import create_rate_limiter
+from .responses import default_response_class
+from .compression import Compressor, CompressionMiddleware
+from .admission import AdmissionMiddleware, create_lanes
+from .metrics import MetricsMiddleware, RouteResolver, metrics_response
+from .db_profiler import DBProfilerMiddleware
+from .profiling import ProfilerMiddleware, profiler_middleware_options
+from .loop_monitor import create_loop_monitor
+from .logging_config import RequestIdMiddleware, configure_logging
+from .idempotency import idempotency_store, get_idempotency_key
+from .warmup import run_warmup
+from .deadlines import DeadlineMiddleware, deadline_middleware_options, mongo_timeout_handler
+from pymongo.errors import PyMongoError
+from .auth import AuthManager, get_current_active_user, get_current_admin_user
+from .database import connect_to_mongo, close_mongo_connection, get_database, read_database, create_indexes, is_index_leader
+from .pool_metrics import pool_metrics
+from .routes.auth import router as auth_router
+from .routes.users import router as users_router
+
+# Structured logs written by a background thread; see logging_config.configure_logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Rate limiting setup. GCRA limits kept in this process by default; point
+# RATE_LIMIT_STORAGE_URI at Redis to share them across workers.
+limiter = create_rate_limiter()
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+# Event loop lag metric and stack dumps of callbacks that block the loop
+loop_monitor = create_loop_monitor()
 
-# Rate limiting setup
-limiter = Limiter(key_func=get_remote_address)
+# Serialized status check listings, invalidated on every write
+STATUS_LIST_LIMIT = 1000
+status_cache = ResponseCache(
+    max_staleness=float(os.environ.get("STATUS_CACHE_MAX_STALENESS", "5")),
+    name="status_list"
+)
+status_list_adapter = TypeAdapter(List[StatusCheck])
+
+# Response compression (gzip/br/zstd), shared with the status listing cache
+compressor = Compressor.from_env()
+
+# Live push of new status checks. With STATUS_STREAM_CHANGE_STREAM enabled the
+# hub is fed from a Mongo change stream instead, so every worker sees every insert.
+STATUS_STREAM_CHANGE_STREAM = os.environ.get("STATUS_STREAM_CHANGE_STREAM", "false").lower() == "true"
+STATUS_STREAM_KEEPALIVE_SECONDS = 15.0
+status_hub = StatusCheckHub(
+    max_queue=int(os.environ.get("STATUS_STREAM_QUEUE_SIZE", "100")),
+    max_subscribers=int(os.environ.get("STATUS_STREAM_MAX_SUBSCRIBERS", "1000"))
+)
+
+# Last check-in per client, maintained on every status check write
+heartbeats = LastSeenIndex(
+    refresh_interval=float(os.environ.get("HEARTBEAT_REFRESH_SECONDS", "30")),
+    mirror_writes=not STATUS_STREAM_CHANGE_STREAM
+)
+
+def observe_remote_status_check(status_check: dict) -> None:
+    """Keep per-worker state current with inserts seen on the change stream"""
+    status_cache.invalidate()
+    heartbeats.observe(status_check["client_name"], status_check["timestamp"])
+
+# Application lifespan: startup before the first request, shutdown after the last
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database connection and indexes, warm up, then mark the app ready"""
+    app.state.ready = False
+    await connect_to_mongo()
+    db = await get_database()
+    await create_indexes()
+    # After the unique client_name index exists, and on one worker only: the
+    # backfill's upserts would otherwise race each other into duplicates
+    if is_index_leader():
+        await heartbeats.backfill(db)
+    await heartbeats.load(db)
+    if STATUS_STREAM_CHANGE_STREAM:
+        status_hub.add_listener(observe_remote_status_check)
+        app.state.status_watcher = asyncio.create_task(
+            watch_status_checks(db, status_hub)
+        )
+    await run_warmup(app)
+    if loop_monitor is not None:
+        loop_monitor.start()
+    app.state.ready = True
+    logger.info("Application startup complete")
+
+    yield
+
+    app.state.ready = False
+    watcher = getattr(app.state, "status_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    await limiter.close()
+    await close_mongo_connection()
+    logger.info("Application shutdown complete")
 
 # Create the main app
 app = FastAPI(
     title="E-commerce API",
     description="A comprehensive e-commerce platform API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=default_response_class()
 )
+app.state.ready = False
 
-# Add rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Per-request deadlines applied to MongoDB operations; 504 when they run out
+app.add_exception_handler(PyMongoError, mongo_timeout_handler)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -45,8 +133,7 @@ api_router.include_router(auth_router)
 api_router.include_router(users_router)
 
 # Health check endpoint
-@api_router.get("/health")
-@limiter.limit("10/minute")
+@api_router.get("/health", dependencies=[Depends(limiter.limit("10/minute"))])
 async def health_check(request: Request):
     """Health check endpoint"""
     return {
@@ -55,48 +142,214 @@ async def health_check(request: Request):
         "version": "1.0.0"
     }
 
+# Readiness probe: 200 only once startup has finished
+@api_router.get("/ready")
+async def readiness_check():
+    """Readiness endpoint used by the entrypoint and load balancers"""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
+
+# Connection pool metrics
+@api_router.get("/health/db-pool")
+async def db_pool_metrics(current_user = Depends(get_current_admin_user)):
+    """MongoDB connection pool checkout and wait metrics for this worker (admin only)"""
+    return pool_metrics.snapshot()
+
 # Hello World endpoint (keeping for compatibility)
-@api_router.get("/")
-@limiter.limit("30/minute")
+@api_router.get("/", dependencies=[Depends(limiter.limit("30/minute"))])
 async def root(request: Request):
     return {"message": "Hello World"}
 
 # Status check endpoints (keeping existing functionality)
-@api_router.post("/status", response_model=StatusCheck)
-@limiter.limit("20/minute")
+@api_router.post("/status", response_model=StatusCheck, dependencies=[Depends(limiter.limit("20/minute"))])
 async def create_status_check(
     request: Request,
     input: StatusCheckCreate,
-    db = Depends(get_database)
+    db = Depends(get_database),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key)
 ):
-    """Create a status check (rate limited)"""
-    status_obj = StatusCheck(**input.dict())
-    await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
+    """Create a status check (rate limited, retry-safe with an Idempotency-Key header)"""
+    async def create():
+        status_obj = StatusCheck(**input.dict())
+        await db.status_checks.insert_one(status_obj.dict())
+        return status_obj
+
+    # Once the check is stored: a failure here must not let a retry insert it again
+    async def after_insert(status_obj: StatusCheck):
+        status_cache.invalidate()
+        if not STATUS_STREAM_CHANGE_STREAM:
+            status_hub.publish(status_obj.dict())
+        await heartbeats.record(db, status_obj.client_name, status_obj.timestamp)
 
-@api_router.get("/status", response_model=List[StatusCheck])
-@limiter.limit("60/minute")
+    return await idempotency_store.run(db, "status", idempotency_key, input, create, after=after_insert)
+
+async def list_status_checks_response(request: Request, db) -> Response:
+    """Serve the status check listing from cache, querying Mongo on a miss"""
+    key = ("status_checks", STATUS_LIST_LIMIT)
+    entry = status_cache.get(key)
+    if entry is None:
+        generation = status_cache.generation
+        status_checks = await db.status_checks.find().to_list(STATUS_LIST_LIMIT)
+        body = status_list_adapter.dump_json(
+            [StatusCheck(**status_check) for status_check in status_checks]
+        )
+        entry = status_cache.set(key, body, generation)
+    return await compressor.cached_response(entry, request.headers.get("accept-encoding"))
+
+@api_router.get("/status", response_model=List[StatusCheck], dependencies=[Depends(limiter.limit("60/minute"))])
 async def get_status_checks(
     request: Request,
-    db = Depends(get_database)
+    db = Depends(read_database("status.list"))
 ):
     """Get status checks (rate limited)"""
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    return await list_status_checks_response(request, db)
 
 # Protected status endpoint example
 @api_router.get("/status/protected", response_model=List[StatusCheck])
 async def get_protected_status_checks(
+    request: Request,
     current_user = Depends(get_current_active_user),
-    db = Depends(get_database)
+    db = Depends(read_database("status.list"))
 ):
     """Get status checks (authentication required)"""
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+    return await list_status_checks_response(request, db)
+
+# Client heartbeat endpoints
+@api_router.get("/status/clients", response_model=List[ClientHeartbeat])
+async def get_client_heartbeats(
+    current_user = Depends(get_current_active_user),
+    db = Depends(read_database("status.clients"))
+):
+    """Last check-in time of every client, most recent first"""
+    await heartbeats.refresh_if_due(db)
+    return heartbeats.clients()
+
+@api_router.get("/status/clients/stale", response_model=List[ClientHeartbeat])
+async def get_stale_clients(
+    older_than_seconds: int = Query(300, ge=1),
+    current_user = Depends(get_current_active_user),
+    db = Depends(read_database("status.clients"))
+):
+    """Clients that have not checked in for longer than older_than_seconds"""
+    await heartbeats.refresh_if_due(db)
+    return heartbeats.stale(timedelta(seconds=older_than_seconds))
+
+# Columnar export of status checks
+@api_router.get("/status/export")
+async def export_status_checks_file(
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user = Depends(get_current_admin_user),
+    db = Depends(read_database("status.export"))
+):
+    """Stream status checks in [start, end) as Parquet or Arrow IPC (admin only)"""
+    extension = "parquet" if format == "parquet" else "arrows"
+    return StreamingResponse(
+        export_status_checks(db, format, start, end),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="status_checks.{extension}"'}
+    )
+
+# Live status check stream endpoints
+@api_router.get("/status/stream", dependencies=[Depends(limiter.limit("10/minute"))])
+async def stream_status_checks(request: Request, client_name: Optional[str] = None):
+    """Push newly created status checks as Server-Sent Events"""
+    if status_hub.full:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers")
+
+    async def event_stream():
+        # Subscribe here, not in the handler: a response that is never iterated
+        # must not hold a subscriber slot
+        subscription = status_hub.subscribe(client_name)
+        if subscription is None:
+            return
+        try:
+            while not await request.is_disconnected():
+                try:
+                    status_check = await asyncio.wait_for(
+                        subscription.get(), timeout=STATUS_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                status_obj = StatusCheck(**status_check)
+                yield f"id: {status_obj.id}\ndata: {status_obj.model_dump_json()}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/status/ws")
+async def status_checks_websocket(websocket: WebSocket, client_name: Optional[str] = None):
+    """Push newly created status checks over a WebSocket"""
+    subscription = status_hub.subscribe(client_name)
+    if subscription is None:
+        await websocket.close(code=1013)
+        return
+    receiver = None
+    try:
+        await websocket.accept()
+        # Reading in the background notices a client disconnect while no events arrive
+        receiver = asyncio.create_task(websocket.receive())
+        while True:
+            getter = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+                continue
+            await websocket.send_text(StatusCheck(**getter.result()).model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if receiver is not None:
+            receiver.cancel()
+        subscription.close()
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint, served on the backend port only (not under /api)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+# MongoDB commands per request; DB_PROFILE_HEADERS=true adds X-DB-Calls/X-DB-Time
+app.add_middleware(
+    DBProfilerMiddleware,
+    headers=os.environ.get("DB_PROFILE_HEADERS", "false").lower() == "true"
+)
+
+# Compress responses above COMPRESSION_MIN_SIZE for clients that accept it
+app.add_middleware(CompressionMiddleware, compressor=compressor)
+
+# Request deadlines (before CORS so preflight responses are never delayed)
+app.add_middleware(DeadlineMiddleware, **deadline_middleware_options())
+
+# Admission control: per-lane adaptive concurrency limits, 503 when overloaded
+admission_lanes = create_lanes()
+if os.environ.get("ADMISSION_ENABLED", "true").lower() == "true":
+    app.add_middleware(AdmissionMiddleware, lanes=admission_lanes)
+
+# Request metrics per route template; outside admission so shed requests are counted
+if os.environ.get("METRICS_ENABLED", "true").lower() == "true":
+    app.add_middleware(MetricsMiddleware, resolver=RouteResolver(app))
+
+# Statistical profiling of sampled requests, or of those sending X-Profile: $PROFILER_SECRET
+if os.environ.get("PROFILER_ENABLED", "false").lower() == "true":
+    app.add_middleware(ProfilerMiddleware, **profiler_middleware_options())
+
+# Request ids for logs and the X-Request-ID response header
+app.add_middleware(RequestIdMiddleware)
+
 # CORS middleware with tighter security
 app.add_middleware(
     CORSMiddleware,
@@ -109,24 +362,3 @@ app.add_middleware(
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
 )
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-# Startup and shutdown events
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database connection and create indexes"""
-    await connect_to_mongo()
-    await create_indexes()
-    logger.info("Application startup complete")
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection"""
-    await close_mongo_connection()
-    logger.info("Application shutdown complete")
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A subscriber's bounded queue of pushed status checks"""
+
+    def __init__(self, hub: "StatusCheckHub", client_name: Optional[str], max_queue: int):
+        self.hub = hub
+        self.client_name = client_name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, status_check: Dict[str, Any]) -> None:
+        """Enqueue without blocking, dropping the oldest item when full"""
+        if self.client_name is not None and status_check.get("client_name") != self.client_name:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(status_check)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class StatusCheckHub:
+    """In-process fan-out of newly created status checks.
+
+    Publishers never wait on subscribers: each subscriber has its own bounded
+    queue and a slow consumer only loses its own oldest events.
+    """
+
+    def __init__(self, max_queue: int = 100, max_subscribers: int = 1000):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self, client_name: Optional[str] = None) -> Optional[Subscription]:
+        """Register a subscriber, or return None when the hub is full"""
+        if self.full:
+            return None
+        subscription = Subscription(self, client_name, self.max_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``listener`` synchronously for every published status check"""
+        self._listeners.append(listener)
+
+    def publish(self, status_check: Dict[str, Any]) -> None:
+        """Push a status check document to every matching subscriber"""
+        self.published += 1
+        for listener in self._listeners:
+            listener(status_check)
+        for subscription in tuple(self._subscribers):
+            subscription.offer(status_check)
+
+
+async def watch_status_checks(db, hub: StatusCheckHub, retry_delay: float = 5.0) -> None:
+    """Feed the hub from a Mongo change stream so inserts from every worker are seen.
+
+    Requires a replica set or sharded cluster. Runs until cancelled.
+    """
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    while True:
+        try:
+            async with db.status_checks.watch(pipeline) as stream:
+                logger.info("Watching status_checks change stream")
+                async for change in stream:
+                    hub.publish(change["fullDocument"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Status check change stream failed: {e}")
+            await asyncio.sleep(retry_delay)
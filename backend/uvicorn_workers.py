@@ -0,0 +1,7 @@
+from uvicorn.workers import UvicornWorker
+
+
+class FastUvicornWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools (PERF_PROFILE=fast)"""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import time
+import logging
+import typing
+from datetime import datetime
+
+from fastapi.routing import APIRoute
+from jose import jwt
+
+from .auth import AuthManager, SECRET_KEY, ALGORITHM, pwd_context
+from .database import db_instance
+from .models import ClientHeartbeat, StatusCheck, Token, User
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STEPS = ("pool", "serializers", "auth", "replay")
+
+# Representative instance of every model used as a response_model
+SAMPLE_USER = User(email="warmup@example.com", full_name="Warmup User")
+RESPONSE_SAMPLES = {
+    User: SAMPLE_USER,
+    Token: Token(access_token="warmup", expires_in=60, user=SAMPLE_USER),
+    StatusCheck: StatusCheck(client_name="warmup"),
+    ClientHeartbeat: ClientHeartbeat(client_name="warmup", last_seen=datetime.utcnow()),
+}
+
+
+def configured_steps() -> typing.List[str]:
+    """Steps from WARMUP_STEPS (comma separated); "replay" also needs WARMUP_REPLAY_FILE"""
+    steps = os.environ.get("WARMUP_STEPS", "pool,serializers,auth")
+    return [step.strip() for step in steps.split(",") if step.strip() in WARMUP_STEPS]
+
+
+async def warm_pool() -> int:
+    """Open minPoolSize connections up front with concurrent pings"""
+    size = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0") or 0)
+    if size and db_instance.client is not None:
+        await asyncio.gather(*(db_instance.client.admin.command("ping") for _ in range(size)))
+    return size
+
+
+def _sample_for(annotation):
+    if typing.get_origin(annotation) in (list, typing.List):
+        item = _sample_for(typing.get_args(annotation)[0])
+        return None if item is None else [item]
+    return RESPONSE_SAMPLES.get(annotation)
+
+
+def warm_serializers(app) -> int:
+    """Validate and serialize a sample through every route's response field"""
+    warmed = 0
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or route.response_field is None:
+            continue
+        sample = _sample_for(route.response_model)
+        if sample is None:
+            continue
+        value, errors = route.response_field.validate(sample, {}, loc=("response",))
+        if errors:
+            logger.warning(f"Warmup sample for {route.path} failed validation: {errors}")
+            continue
+        route.response_field.serialize(value, mode="json")
+        warmed += 1
+    return warmed
+
+
+def warm_auth() -> None:
+    """Initialize the JWT and bcrypt backends, which both load lazily"""
+    token = AuthManager.create_access_token(data={"sub": SAMPLE_USER.email})
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    pwd_context.verify("warmup", pwd_context.hash("warmup"))
+
+
+async def replay_requests(app, path: str) -> int:
+    """Replay recorded requests in-process.
+
+    The file holds one JSON object per line with ``method``, ``path`` and
+    optional ``headers`` and ``json``. Only safe methods are replayed unless
+    WARMUP_REPLAY_UNSAFE is true, since replays run against the live database.
+    """
+    import httpx
+
+    allow_unsafe = os.environ.get("WARMUP_REPLAY_UNSAFE", "false").lower() == "true"
+    replayed = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                sample = json.loads(line)
+                method = sample.get("method", "GET").upper()
+                if method not in ("GET", "HEAD", "OPTIONS") and not allow_unsafe:
+                    continue
+                await client.request(
+                    method, sample["path"], headers=sample.get("headers"), json=sample.get("json")
+                )
+                replayed += 1
+    return replayed
+
+
+async def run_warmup(app) -> None:
+    """Run the configured warmup steps, logging how long each took"""
+    for step in configured_steps():
+        started = time.perf_counter()
+        try:
+            if step == "pool":
+                result = await warm_pool()
+            elif step == "serializers":
+                result = warm_serializers(app)
+            elif step == "auth":
+                result = await asyncio.to_thread(warm_auth)
+            else:
+                replay_file = os.environ.get("WARMUP_REPLAY_FILE")
+                if not replay_file:
+                    continue
+                result = await replay_requests(app, replay_file)
+        except Exception as e:
+            logger.warning(f"Warmup step {step} failed: {e}")
+            continue
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Warmup step {step} done in {elapsed_ms:.1f} ms ({result})")
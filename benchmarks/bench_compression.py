@@ -0,0 +1,80 @@
+"""CPU cost versus bytes saved for each response encoding and level.
+
+Compresses 1000-item GET /api/users and GET /api/status bodies with every
+available encoding at a range of levels and reports the compressed size,
+ratio and compression time. Use it to choose COMPRESSION_LEVEL_<ENCODING>.
+
+Run with ``python -m benchmarks.bench_compression [--json]``.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from typing import List
+
+from pydantic import TypeAdapter
+
+from backend.compression import Compressor, available_encodings
+from backend.models import StatusCheck, User
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+
+
+def bodies(size):
+    users = [User(email=f"user{i}@example.com", full_name=f"User {i}") for i in range(size)]
+    status_checks = [StatusCheck(client_name=f"client-{i % 50}") for i in range(size)]
+    return {
+        "users": TypeAdapter(List[User]).dump_json(users),
+        "status": TypeAdapter(List[StatusCheck]).dump_json(status_checks),
+    }
+
+
+def run(size, iterations):
+    results = {}
+    for name, body in bodies(size).items():
+        rows = []
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                compressor = Compressor(levels={encoding: level})
+                compressed = compressor.compress(body, encoding)
+                samples = []
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    compressor.compress(body, encoding)
+                    samples.append(time.perf_counter() - started)
+                mean = statistics.mean(samples)
+                rows.append({
+                    "encoding": encoding,
+                    "level": level,
+                    "bytes": len(compressed),
+                    "ratio": round(len(body) / len(compressed), 2),
+                    "compress_us": round(mean * 1e6, 1),
+                    "mb_per_second": round(len(body) / mean / 1e6, 1),
+                })
+        results[name] = {"identity_bytes": len(body), "encodings": rows}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = run(args.size, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"{name}: {result['identity_bytes']} bytes uncompressed")
+        for row in result["encodings"]:
+            print(
+                f"  {row['encoding']:5} level {row['level']:>2}  {row['bytes']:>8} bytes  "
+                f"x{row['ratio']:<6} {row['compress_us']:>9.1f} us  {row['mb_per_second']:>7.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Microbenchmarks of the per-request hot paths, with a regression gate.
+
+- create_access_token: AuthManager.create_access_token, as in /auth/login
+- decode_access_token: jwt.decode + TokenData, as in get_current_user
+- user_from_doc:       User(**doc) from a stored document, as in get_user_by_email
+- status_checks_build_1000:     StatusCheck(**doc) for a 1000-document listing
+- status_checks_serialize_1000: TypeAdapter.dump_json of 1000 StatusChecks
+- rate_limit_local_hits_100:    100 RateLimiter.hit calls decided from a local reservation
+
+``run`` prints timings and with ``--save`` stores them as a baseline.
+``compare`` runs again and exits with status 1 when any benchmark's median
+is slower than the baseline by more than the threshold. Baselines only mean
+something on the machine that recorded them, so record one there first:
+
+    python -m benchmarks.bench_hotpaths run --save benchmarks/baselines/hotpaths.json
+    python -m benchmarks.bench_hotpaths compare --baseline benchmarks/baselines/hotpaths.json \\
+        --threshold 0.10 --threshold status_checks_serialize_1000=0.20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from jose import jwt
+from pydantic import TypeAdapter
+
+from backend.auth import ALGORITHM, SECRET_KEY, AuthManager
+from backend.models import StatusCheck, TokenData, User
+from backend.ratelimit import MemoryGCRA, Rate, RateLimiter
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def user_doc() -> dict:
+    doc = User(email="bench@example.com", full_name="Bench User").model_dump()
+    doc["_id"] = "0" * 24
+    doc["password_hash"] = "$2b$12$" + "x" * 53
+    return doc
+
+
+def status_check_docs(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {"id": str(uuid.uuid4()), "client_name": f"client-{i % 50}", "timestamp": now - timedelta(seconds=i)}
+        for i in range(count)
+    ]
+
+
+def benchmarks() -> Dict[str, Callable[[], object]]:
+    token = AuthManager.create_access_token({"sub": "bench@example.com"})
+    doc = user_doc()
+    docs = status_check_docs(1000)
+    status_checks = [StatusCheck(**d) for d in docs]
+    adapter = TypeAdapter(List[StatusCheck])
+
+    def decode_access_token():
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return TokenData(email=payload.get("sub"))
+
+    loop = asyncio.new_event_loop()
+    limiter = RateLimiter(MemoryGCRA(), max_reserve=1000)
+    rate = Rate.parse("1000000000/second")
+
+    async def rate_limit_hits():
+        for _ in range(100):
+            await limiter.hit("bench", rate)
+
+    return {
+        "create_access_token": lambda: AuthManager.create_access_token({"sub": "bench@example.com"}),
+        "decode_access_token": decode_access_token,
+        "user_from_doc": lambda: User(**{k: v for k, v in doc.items() if k != "password_hash"}),
+        "status_checks_build_1000": lambda: [StatusCheck(**d) for d in docs],
+        "status_checks_serialize_1000": lambda: adapter.dump_json(status_checks),
+        "rate_limit_local_hits_100": lambda: loop.run_until_complete(rate_limit_hits()),
+    }
+
+
+def time_benchmark(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    """Per-call microseconds over ``repeat`` rounds, each long enough to time reliably"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= min_time:
+            break
+        loops *= 2
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+    return {
+        "median_us": round(statistics.median(samples), 3),
+        "min_us": round(min(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def run(repeat: int, min_time: float, only=None) -> dict:
+    results = {}
+    for name, fn in benchmarks().items():
+        if only and name not in only:
+            continue
+        results[name] = time_benchmark(fn, repeat, min_time)
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "benchmarks": results,
+    }
+
+
+def parse_thresholds(values) -> Dict[str, float]:
+    thresholds = {"*": DEFAULT_THRESHOLD}
+    for value in values or []:
+        name, _, fraction = value.rpartition("=")
+        thresholds[name or "*"] = float(fraction)
+    return thresholds
+
+
+def compare(baseline: dict, current: dict, thresholds: Dict[str, float]) -> List[dict]:
+    rows = []
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            rows.append({"name": name, "status": "new", "current_us": result["median_us"]})
+            continue
+        change = result["median_us"] / base["median_us"] - 1
+        threshold = thresholds.get(name, thresholds["*"])
+        rows.append({
+            "name": name,
+            "baseline_us": base["median_us"],
+            "current_us": result["median_us"],
+            "change": round(change, 4),
+            "threshold": threshold,
+            "status": "regressed" if change > threshold else "ok",
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "compare"):
+        sub = subcommands.add_parser(name)
+        sub.add_argument("--repeat", type=int, default=7, help="timed rounds per benchmark")
+        sub.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per round")
+        sub.add_argument("--only", action="append", help="run only this benchmark (repeatable)")
+        sub.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    subcommands.choices["run"].add_argument("--save", metavar="FILE", help="store the results as a baseline")
+    subcommands.choices["compare"].add_argument("--baseline", required=True, metavar="FILE")
+    subcommands.choices["compare"].add_argument(
+        "--threshold", action="append", metavar="[NAME=]FRACTION",
+        help=f"allowed slowdown of the median, overall or per benchmark (default {DEFAULT_THRESHOLD})"
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    current = run(args.repeat, args.min_time, args.only)
+
+    if args.command == "run":
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+                f.write("\n")
+        if args.json:
+            print(json.dumps(current, indent=2))
+            return
+        for name, result in current["benchmarks"].items():
+            print(f"{name:30} {result['median_us']:>12.3f} us  (min {result['min_us']:.3f}, "
+                  f"stdev {result['stdev_us']:.3f}, {result['loops']} loops x {result['repeat']})")
+        return
+
+    rows = compare(baseline, current, parse_thresholds(args.threshold))
+    regressed = [row for row in rows if row["status"] == "regressed"]
+    if args.json:
+        print(json.dumps({"machine": current["machine"], "baseline_machine": baseline.get("machine"),
+                          "results": rows, "regressed": len(regressed)}, indent=2))
+    else:
+        if baseline.get("machine") != current["machine"]:
+            print("warning: baseline was recorded on a different machine or Python version")
+        for row in rows:
+            if row["status"] == "new":
+                print(f"{row['name']:30} {'':>12} {row['current_us']:>12.3f} us  new")
+                continue
+            print(f"{row['name']:30} {row['baseline_us']:>12.3f} {row['current_us']:>12.3f} us  "
+                  f"{row['change']:+7.1%} (limit {row['threshold']:+.0%})  {row['status']}")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
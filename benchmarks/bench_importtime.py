@@ -0,0 +1,135 @@
+"""Import time of the backend package, with a budget check for cold starts.
+
+Imports a module (``backend.server`` by default) in fresh interpreters under
+``python -X importtime`` and reports the total, the packages that cost the
+most (summed self time of their modules) and the slowest single modules.
+Every gunicorn worker and every new replica pays this before it can serve.
+
+Exits with status 1 when the median total exceeds ``--budget-ms`` or when a
+forbidden module is imported. The forbidden list holds optional heavyweight
+dependencies that must stay behind function-level imports (pandas, numpy
+and pyarrow for exports, redis for shared rate limits, pyinstrument for the
+profiler, ...):
+
+    python -m benchmarks.bench_importtime --budget-ms 800
+    python -m benchmarks.bench_importtime --module backend.datagen --allow typer
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 1000
+FORBIDDEN = ("boto3", "botocore", "pandas", "numpy", "pyarrow", "redis", "pyinstrument", "httpx", "typer")
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def parse(stderr: str) -> List[dict]:
+    """Rows of ``-X importtime`` output, in the order the imports finished"""
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append({
+                "module": match[3],
+                "self_us": int(match[1]),
+                "cumulative_us": int(match[2]),
+            })
+    return rows
+
+
+def import_rows(module: str) -> List[dict]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse(result.stderr)
+
+
+def total_us(rows: List[dict], module: str) -> int:
+    """Time spent importing ``module`` itself, excluding interpreter startup"""
+    return next(row["cumulative_us"] for row in reversed(rows) if row["module"] == module)
+
+
+def by_package(rows: List[dict]) -> Dict[str, int]:
+    packages = defaultdict(int)
+    for row in rows:
+        packages[row["module"].split(".")[0]] += row["self_us"]
+    return dict(sorted(packages.items(), key=lambda item: -item[1]))
+
+
+def run(module: str, runs: int, top: int, forbidden: List[str]) -> dict:
+    import_rows(module)  # compile and cache bytecode, as a deployed image would have it
+    samples = [import_rows(module) for _ in range(runs)]
+    totals = [total_us(rows, module) for rows in samples]
+    rows = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    imported = {row["module"] for row in rows}
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "min_ms": round(min(totals) / 1000, 1),
+        "modules": len(rows),
+        "packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)} for name, us in list(by_package(rows).items())[:top]
+        ],
+        "slowest": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in sorted(rows, key=lambda row: -row["self_us"])[:top]
+        ],
+        "forbidden": sorted({name.split(".")[0] for name in imported} & set(forbidden)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--module", default="backend.server", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="packages and modules to list")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"fail above this median import time (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--forbid", action="append", default=[], metavar="PACKAGE",
+                        help="also fail if this package is imported (repeatable)")
+    parser.add_argument("--allow", action="append", default=[], metavar="PACKAGE",
+                        help="drop this package from the default forbidden list (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    forbidden = [name for name in FORBIDDEN if name not in args.allow] + args.forbid
+    result = run(args.module, args.runs, args.top, forbidden)
+    over_budget = result["median_ms"] > args.budget_ms
+    result["budget_ms"] = args.budget_ms
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {result['module']}: {result['median_ms']:.1f} ms median, {result['min_ms']:.1f} ms min "
+              f"over {args.runs} runs, {result['modules']} modules (budget {args.budget_ms:.0f} ms)")
+        print("\nby package (self time):")
+        for row in result["packages"]:
+            print(f"  {row['package']:30} {row['self_ms']:>8.1f} ms")
+        print("\nslowest modules (self time):")
+        for row in result["slowest"]:
+            print(f"  {row['module']:50} {row['self_ms']:>8.1f} ms")
+        if over_budget:
+            print(f"\nover budget by {result['median_ms'] - args.budget_ms:.1f} ms")
+        if result["forbidden"]:
+            print("\nforbidden modules imported (move these imports into the functions that need them):")
+            for name in result["forbidden"]:
+                print(f"  {name}")
+    sys.exit(1 if over_budget or result["forbidden"] else 0)
+
+
+if __name__ == "__main__":
+    main()
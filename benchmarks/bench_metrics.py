@@ -0,0 +1,104 @@
+"""Per-request overhead of the Prometheus metrics middleware.
+
+Drives a no-op ASGI app through MetricsMiddleware and reports the extra
+microseconds per request compared with calling the app directly, plus the
+cost of a single record_request call. Run with ``--multiprocess`` to measure
+the file-backed values used when PROMETHEUS_MULTIPROC_DIR is set.
+
+Run with ``python -m benchmarks.bench_metrics [--multiprocess] [--json]``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def noop_send(message):
+    pass
+
+
+def make_app():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/api/users/{user_id}")
+    async def get_user(user_id: str):
+        return {}
+
+    return app
+
+
+async def drive(app, iterations, distinct_paths):
+    scopes = [
+        {"type": "http", "method": "GET", "path": f"/api/users/{i}", "headers": []}
+        for i in range(distinct_paths)
+    ]
+    started = time.perf_counter()
+    for i in range(iterations):
+        await app(scopes[i % distinct_paths], None, noop_send)
+    return (time.perf_counter() - started) / iterations
+
+
+def run(iterations, distinct_paths):
+    from backend.metrics import MetricsMiddleware, RouteResolver, record_request
+
+    middleware = MetricsMiddleware(noop_app, RouteResolver(make_app()))
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(drive(middleware, 1000, distinct_paths))
+        baseline = loop.run_until_complete(drive(noop_app, iterations, distinct_paths))
+        instrumented = loop.run_until_complete(drive(middleware, iterations, distinct_paths))
+    finally:
+        loop.close()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        record_request("GET", "/api/users/{user_id}", 200, 0.001)
+    record_us = (time.perf_counter() - started) / iterations * 1e6
+
+    return {
+        "multiprocess": bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR")),
+        "iterations": iterations,
+        "distinct_paths": distinct_paths,
+        "baseline_us": round(baseline * 1e6, 2),
+        "instrumented_us": round(instrumented * 1e6, 2),
+        "overhead_us": round((instrumented - baseline) * 1e6, 2),
+        "record_request_us": round(record_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--distinct-paths", type=int, default=100,
+                        help="number of different request paths (route resolver cache entries)")
+    parser.add_argument("--multiprocess", action="store_true", help="use file-backed multiprocess values")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as multiproc_dir:
+        if args.multiprocess:
+            # Must be set before prometheus_client creates any metric
+            os.environ["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+        result = run(args.iterations, args.distinct_paths)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"multiprocess: {result['multiprocess']}")
+    print(f"no-op app:          {result['baseline_us']:>8.2f} us/request")
+    print(f"with metrics:       {result['instrumented_us']:>8.2f} us/request")
+    print(f"overhead:           {result['overhead_us']:>8.2f} us/request")
+    print(f"record_request():   {result['record_request_us']:>8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Per-route handler cost with no network in the way.
+
+Drives ``backend.server.app`` in-process through httpx's ASGI transport, against an
+in-memory stand-in for the Motor database (benchmarks/fake_motor.py) or,
+with ``--mongo-url``, a throwaway database on a real mongod. Every HTTP
+route in server.py, routes/auth.py and routes/users.py is covered except
+the long-lived stream and WebSocket endpoints.
+
+For each route it reports microseconds per request, and from a separate
+tracemalloc pass the peak memory allocated while serving a request and the
+memory still held after it (which should stay near zero). Rate limiting is
+disabled and only warnings are logged. Routes that hash or verify a
+password run fewer iterations, since bcrypt dominates them.
+
+Run with ``python -m benchmarks.bench_routes [--mongo-url URL] [--json]``.
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+# Settings for the benchmark process; must be in place before server is imported
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+import httpx
+
+# Slow routes (bcrypt) run iterations // SLOW_ROUTE_DIVISOR times
+SLOW_ROUTE_DIVISOR = 20
+PASSWORD = "BenchPassword123!"
+
+
+class Fixture:
+    """Users, tokens and documents shared by the benchmark cases"""
+
+    def __init__(self, db, users: int, status_checks: int):
+        self.db = db
+        self.users = users
+        self.status_checks = status_checks
+        self.counter = itertools.count()
+        self.headers = {}
+        self.user_headers = {}
+        self.user_ids = []
+
+    def unique(self) -> str:
+        return f"{next(self.counter)}-{uuid.uuid4().hex[:8]}"
+
+    async def insert_user(self, email: str, role: str = "user") -> str:
+        from backend.models import User
+
+        user = User(email=email, full_name="Bench User", role=role)
+        doc = user.model_dump()
+        doc["password_hash"] = self.password_hash
+        await self.db.users.insert_one(doc)
+        return user.id
+
+    async def setup(self) -> None:
+        from backend.auth import AuthManager
+        from datetime import datetime, timedelta
+        from backend.server import heartbeats
+
+        self.password_hash = AuthManager.get_password_hash(PASSWORD)
+        # Inserted first so the fake database finds them without a long scan
+        self.admin_email = f"admin-{self.unique()}@bench.example.com"
+        self.user_email = f"user-{self.unique()}@bench.example.com"
+        await self.insert_user(self.admin_email, role="admin")
+        self.user_id = await self.insert_user(self.user_email)
+        for _ in range(self.users):
+            self.user_ids.append(await self.insert_user(f"member-{self.unique()}@bench.example.com"))
+
+        now = datetime.utcnow()
+        for i in range(self.status_checks):
+            client_name = f"client-{i % 50}"
+            timestamp = now - timedelta(seconds=i)
+            await self.db.status_checks.insert_one(
+                {"id": str(uuid.uuid4()), "client_name": client_name, "timestamp": timestamp}
+            )
+            await heartbeats.record(self.db, client_name, timestamp)
+
+        self.headers = self.auth_headers(self.admin_email)
+        self.user_headers = self.auth_headers(self.user_email)
+
+    @staticmethod
+    def auth_headers(email: str) -> dict:
+        from backend.auth import AuthManager
+
+        return {"Authorization": f"Bearer {AuthManager.create_access_token({'sub': email})}"}
+
+
+# A request as (method, path, httpx keyword arguments)
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Case:
+    name: str
+    request: Callable[[Fixture], Request]
+    expected: Tuple[int, ...] = (200,)
+    slow: bool = False
+    # Runs before each request, inside the timed loop
+    before: Optional[Callable[[Fixture], None]] = None
+    # Creates whatever ``count`` requests will consume, before timing starts
+    prepare: Optional[Callable[[Fixture, int], object]] = None
+
+
+def invalidate_status_cache(fixture: Fixture) -> None:
+    from backend.server import status_cache
+
+    status_cache.invalidate()
+
+
+async def prepare_deletions(fixture: Fixture, count: int) -> None:
+    fixture.deletable = [
+        await fixture.insert_user(f"doomed-{fixture.unique()}@bench.example.com") for _ in range(count)
+    ]
+
+
+async def prepare_login_user(fixture: Fixture, count: int) -> None:
+    # A dedicated account so PUT /auth/me cases cannot change its password
+    fixture.login_email = f"login-{fixture.unique()}@bench.example.com"
+    await fixture.insert_user(fixture.login_email)
+
+
+CASES = [
+    Case("GET /api/health", lambda f: ("GET", "/api/health", {})),
+    Case("GET /api/ready", lambda f: ("GET", "/api/ready", {})),
+    Case("GET /api/", lambda f: ("GET", "/api/", {})),
+    Case("GET /api/health/db-pool", lambda f: ("GET", "/api/health/db-pool", {"headers": f.headers})),
+    Case("GET /metrics", lambda f: ("GET", "/metrics", {})),
+    Case("POST /api/status", lambda f: (
+        "POST", "/api/status", {"json": {"client_name": f"client-{next(f.counter) % 50}"}}
+    )),
+    Case("POST /api/status (Idempotency-Key)", lambda f: (
+        "POST", "/api/status",
+        {"json": {"client_name": "client-1"}, "headers": {"Idempotency-Key": f.unique()}}
+    )),
+    Case("GET /api/status (cached)", lambda f: ("GET", "/api/status", {})),
+    Case("GET /api/status (uncached)", lambda f: ("GET", "/api/status", {}), before=invalidate_status_cache),
+    Case("GET /api/status (cached, zstd)", lambda f: (
+        "GET", "/api/status", {"headers": {"Accept-Encoding": "zstd, br, gzip"}}
+    )),
+    Case("GET /api/status/protected", lambda f: ("GET", "/api/status/protected", {"headers": f.user_headers})),
+    Case("GET /api/status/clients", lambda f: ("GET", "/api/status/clients", {"headers": f.user_headers})),
+    Case("GET /api/status/clients/stale", lambda f: (
+        "GET", "/api/status/clients/stale", {"params": {"older_than_seconds": 60}, "headers": f.user_headers}
+    )),
+    Case("GET /api/status/export?format=parquet", lambda f: (
+        "GET", "/api/status/export", {"params": {"format": "parquet"}, "headers": f.headers}
+    )),
+    Case("GET /api/status/export?format=arrow", lambda f: (
+        "GET", "/api/status/export", {"params": {"format": "arrow"}, "headers": f.headers}
+    )),
+    Case("POST /api/auth/register", lambda f: (
+        "POST", "/api/auth/register",
+        {"json": {"email": f"new-{f.unique()}@bench.example.com", "password": PASSWORD, "full_name": "New User"}}
+    ), expected=(201,), slow=True),
+    Case("POST /api/auth/login", lambda f: (
+        "POST", "/api/auth/login", {"json": {"email": f.login_email, "password": PASSWORD}}
+    ), slow=True, prepare=prepare_login_user),
+    Case("GET /api/auth/me", lambda f: ("GET", "/api/auth/me", {"headers": f.user_headers})),
+    Case("PUT /api/auth/me", lambda f: (
+        "PUT", "/api/auth/me", {"json": {"full_name": f"Renamed {next(f.counter)}"}, "headers": f.user_headers}
+    )),
+    Case("GET /api/users/", lambda f: ("GET", "/api/users/", {"headers": f.headers})),
+    Case("GET /api/users/?limit=1000", lambda f: (
+        "GET", "/api/users/", {"params": {"limit": 1000}, "headers": f.headers}
+    )),
+    Case("GET /api/users/{user_id}", lambda f: ("GET", f"/api/users/{f.user_id}", {"headers": f.headers})),
+    Case("PUT /api/users/{user_id}", lambda f: (
+        "PUT", f"/api/users/{f.user_id}", {"json": {"full_name": f"Edited {next(f.counter)}"}, "headers": f.headers}
+    )),
+    Case("DELETE /api/users/{user_id}", lambda f: (
+        "DELETE", f"/api/users/{f.deletable.pop()}", {"headers": f.headers}
+    ), prepare=prepare_deletions),
+]
+
+SKIPPED = {
+    "GET /api/status/stream": "long-lived server-sent events",
+    "WS /api/status/ws": "long-lived WebSocket",
+}
+
+
+async def send(client: httpx.AsyncClient, fixture: Fixture, case: Case) -> bool:
+    if case.before is not None:
+        case.before(fixture)
+    method, path, kwargs = case.request(fixture)
+    response = await client.request(method, path, **kwargs)
+    return response.status_code in case.expected
+
+
+async def measure(client: httpx.AsyncClient, fixture: Fixture, case: Case,
+                  iterations: int, warmup: int, alloc_iterations: int) -> dict:
+    if case.slow:
+        iterations = max(1, iterations // SLOW_ROUTE_DIVISOR)
+        warmup = min(warmup, 1)
+        alloc_iterations = min(alloc_iterations, 2)
+    if case.prepare is not None:
+        await case.prepare(fixture, warmup + iterations + alloc_iterations)
+
+    errors = 0
+    for _ in range(warmup):
+        errors += not await send(client, fixture, case)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        errors += not await send(client, fixture, case)
+    elapsed = time.perf_counter() - started
+
+    peak_total = retained_total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            # Collect cyclic garbage on both sides so "retained" is memory the request kept alive
+            gc.collect()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            errors += not await send(client, fixture, case)
+            _, peak = tracemalloc.get_traced_memory()
+            gc.collect()
+            after, _ = tracemalloc.get_traced_memory()
+            peak_total += peak - before
+            retained_total += after - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "route": case.name,
+        "iterations": iterations,
+        "us_per_request": round(elapsed / iterations * 1e6, 1),
+        "peak_kb_per_request": round(peak_total / max(1, alloc_iterations) / 1024, 1),
+        "retained_bytes_per_request": round(retained_total / max(1, alloc_iterations)),
+        "errors": errors,
+    }
+
+
+async def run(iterations: int, warmup: int, alloc_iterations: int, users: int, status_checks: int,
+              mongo_url: Optional[str], only: Optional[str]) -> dict:
+    from backend import database, server
+
+    if mongo_url:
+        os.environ["MONGO_URL"] = mongo_url
+        os.environ["DB_NAME"] = f"bench_{uuid.uuid4().hex[:8]}"
+        await database.connect_to_mongo()
+        await database.create_indexes()
+        backend = "mongod"
+    else:
+        from benchmarks.fake_motor import FakeDatabase
+
+        database.db_instance.database = FakeDatabase()
+        database.db_instance.read_databases = {}
+        backend = "memory"
+    db = await database.get_database()
+    server.app.state.ready = True
+
+    results = []
+    try:
+        fixture = Fixture(db, users, status_checks)
+        await fixture.setup()
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for case in CASES:
+                if only and only not in case.name:
+                    continue
+                results.append(await measure(client, fixture, case, iterations, warmup, alloc_iterations))
+    finally:
+        if mongo_url:
+            await database.db_instance.client.drop_database(os.environ["DB_NAME"])
+            await database.close_mongo_connection()
+
+    return {
+        "backend": backend,
+        "users": users,
+        "status_checks": status_checks,
+        "routes": results,
+        "skipped": SKIPPED,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-iterations", type=int, default=20,
+                        help="requests per route measured under tracemalloc")
+    parser.add_argument("--users", type=int, default=200, help="users in the database")
+    parser.add_argument("--status-checks", type=int, default=1000, help="status checks in the database")
+    parser.add_argument("--mongo-url", help="benchmark against a real mongod (uses a temporary database)")
+    parser.add_argument("--only", help="only routes whose name contains this text")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        args.iterations, args.warmup, args.alloc_iterations, args.users, args.status_checks,
+        args.mongo_url, args.only
+    ))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"backend: {results['backend']}, {results['users']} users, {results['status_checks']} status checks")
+    print(f"{'route':42} {'iters':>6} {'us/req':>10} {'peak KB':>9} {'retained B':>11} {'errors':>6}")
+    for row in results["routes"]:
+        print(
+            f"{row['route']:42} {row['iterations']:>6} {row['us_per_request']:>10.1f} "
+            f"{row['peak_kb_per_request']:>9.1f} {row['retained_bytes_per_request']:>11} {row['errors']:>6}"
+        )
+    for route, reason in results["skipped"].items():
+        print(f"{route:42} skipped: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Response serialization cost for the list-heavy endpoints.
+
+Compares, for 1000-item GET /api/users and GET /api/status payloads:
+
+- fastapi:  FastAPI's response_model validation + JSONResponse (stock settings)
+- orjson:   the same with ORJSONModelResponse (PERF_PROFILE=fast)
+- direct:   TypeAdapter.dump_json, which the list endpoints now return directly
+
+Run with ``python -m benchmarks.bench_serialization [--json]``.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from typing import List
+
+from fastapi._compat import ModelField
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from backend.models import StatusCheck, User
+from backend.responses import ORJSONModelResponse
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(fn, iterations):
+    fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "ops_per_second": round(1 / statistics.mean(samples), 1),
+        "p50_us": round(percentile(samples, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(samples, 0.99) * 1e6, 1),
+    }
+
+
+LOOP = asyncio.new_event_loop()
+
+
+def fastapi_render(field: ModelField, response_class, items):
+    content = LOOP.run_until_complete(
+        serialize_response(field=field, response_content=items, is_coroutine=True)
+    )
+    return response_class(content).body
+
+
+def payloads(size):
+    users = [User(email=f"user{i}@example.com", full_name=f"User {i}") for i in range(size)]
+    status_checks = [StatusCheck(client_name=f"client-{i % 50}") for i in range(size)]
+    return {"users": (List[User], users), "status": (List[StatusCheck], status_checks)}
+
+
+def run(size, iterations):
+    results = {}
+    for name, (annotation, items) in payloads(size).items():
+        field = create_response_field(name="response", type_=annotation)
+        adapter = TypeAdapter(annotation)
+        results[name] = {
+            "fastapi": measure(lambda: fastapi_render(field, JSONResponse, items), iterations),
+            "orjson": measure(lambda: fastapi_render(field, ORJSONModelResponse, items), iterations),
+            "direct": measure(lambda: adapter.dump_json(items), iterations),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = run(args.size, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, variants in results.items():
+        print(f"{name} ({args.size} items)")
+        for variant, stats in variants.items():
+            print(f"  {variant:8} {stats['ops_per_second']:>10.1f} ops/s  p50 {stats['p50_us']:>9.1f} us  p99 {stats['p99_us']:>9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
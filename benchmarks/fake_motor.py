@@ -0,0 +1,215 @@
+"""In-memory stand-in for the Motor database handle returned by ``get_database``.
+
+Implements only what the API uses: find (with projection, skip, limit,
+to_list and async iteration), find_one, insert_one, update_one with $set,
+$max, $inc, $setOnInsert and upsert, delete_one, aggregate with a $group of
+$max/$sum, bulk_write of UpdateOne, list_indexes/create_indexes, with_options
+and ``client.admin.command("ping")``. Filters support equality and $gt, $gte,
+$lt, $lte, $ne and $in. Every call yields to the event loop once, as a real
+round trip would.
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+COMPARISONS = {
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$ne": lambda value, operand: value != operand,
+    "$in": lambda value, operand: value in operand,
+}
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and condition and next(iter(condition)).startswith("$"):
+            if not all(COMPARISONS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return dict(doc)
+    included = {field for field, flag in projection.items() if flag and field != "_id"}
+    if included:
+        result = {field: doc[field] for field in included if field in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> bool:
+    before = dict(doc)
+    for field, value in update.get("$set", {}).items():
+        doc[field] = value
+    for field, value in update.get("$max", {}).items():
+        if field not in doc or value > doc[field]:
+            doc[field] = value
+    for field, value in update.get("$inc", {}).items():
+        doc[field] = doc.get(field, 0) + value
+    if inserting:
+        doc.update(update.get("$setOnInsert", {}))
+    return doc != before
+
+
+class FakeCursor:
+    def __init__(self, docs: List[dict]):
+        self._docs = docs
+        self._skip = 0
+        self._limit = 0
+        self._position = None
+
+    def skip(self, count: int) -> "FakeCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "FakeCursor":
+        self._limit = count
+        return self
+
+    def _remaining(self) -> List[dict]:
+        if self._position is None:
+            end = self._skip + self._limit if self._limit else None
+            self._docs = self._docs[self._skip:end]
+            self._position = 0
+        return self._docs[self._position:]
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        await asyncio.sleep(0)
+        remaining = self._remaining()
+        batch = remaining if length is None else remaining[:length]
+        self._position += len(batch)
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        remaining = self._remaining()
+        if not remaining:
+            raise StopAsyncIteration
+        self._position += 1
+        return remaining[0]
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: Dict[Any, dict] = {}
+        self.indexes = [{"name": "_id_", "key": {"_id": 1}}]
+
+    def _matching(self, query: Optional[dict]):
+        return (doc for doc in self.docs.values() if matches(doc, query or {}))
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> FakeCursor:
+        return FakeCursor([project(doc, projection) for doc in self._matching(query)])
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        await asyncio.sleep(0)
+        doc = next(self._matching(query), None)
+        return None if doc is None else project(doc, projection)
+
+    async def insert_one(self, doc: dict):
+        await asyncio.sleep(0)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}")
+        self.docs[doc["_id"]] = dict(doc)
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    def _update(self, query: dict, update: dict, upsert: bool = False):
+        doc = next(self._matching(query), None)
+        if doc is not None:
+            modified = apply_update(doc, update)
+            return SimpleNamespace(matched_count=1, modified_count=int(modified), upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        doc["_id"] = ObjectId()
+        apply_update(doc, update, inserting=True)
+        self.docs[doc["_id"]] = doc
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False):
+        await asyncio.sleep(0)
+        return self._update(query, update, upsert)
+
+    async def delete_one(self, query: dict):
+        await asyncio.sleep(0)
+        doc = next(self._matching(query), None)
+        if doc is None:
+            return SimpleNamespace(deleted_count=0)
+        del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=1)
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        await asyncio.sleep(0)
+        for operation in operations:
+            self._update(operation._filter, operation._doc, operation._upsert)
+        return SimpleNamespace(acknowledged=True)
+
+    def aggregate(self, pipeline: List[dict], **kwargs) -> FakeCursor:
+        [stage] = pipeline
+        group = stage["$group"]
+        key_field = group["_id"].lstrip("$")
+        groups: Dict[Any, dict] = {}
+        for doc in self.docs.values():
+            key = doc.get(key_field)
+            result = groups.setdefault(key, {"_id": key})
+            for field, (op, operand) in ((f, next(iter(spec.items()))) for f, spec in group.items() if f != "_id"):
+                value = doc.get(operand.lstrip("$")) if isinstance(operand, str) else operand
+                if op == "$sum":
+                    result[field] = result.get(field, 0) + value
+                elif op == "$max" and (field not in result or value > result[field]):
+                    result[field] = value
+        return FakeCursor(list(groups.values()))
+
+    def list_indexes(self) -> FakeCursor:
+        return FakeCursor([dict(index) for index in self.indexes])
+
+    async def create_indexes(self, models) -> List[str]:
+        names = [model.document["name"] for model in models]
+        self.indexes.extend(dict(model.document) for model in models)
+        return names
+
+    async def drop_index(self, name: str) -> None:
+        self.indexes = [index for index in self.indexes if index["name"] != name]
+
+
+class FakeAdmin:
+    async def command(self, name: str, *args, **kwargs) -> dict:
+        await asyncio.sleep(0)
+        return {"ok": 1.0}
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.client = SimpleNamespace(admin=FakeAdmin())
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = FakeCollection(name)
+        return collection
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def with_options(self, **kwargs) -> "FakeDatabase":
+        return self
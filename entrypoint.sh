@@ -1,28 +1,54 @@
 #!/bin/sh
 set -e
 
-# Start the FastAPI backend
-cd /backend || { echo "Backend directory not found"; exit 1; }
+# Start the FastAPI backend (the backend package lives in /app/backend)
+cd /app || { echo "Backend directory not found"; exit 1; }
 
 echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# WEB_CONCURRENCY > 1 runs gunicorn with that many uvicorn workers
+# (see backend/gunicorn.conf.py); otherwise a single uvicorn process is started.
+# Gunicorn logs a warning at startup when rate limits or the status stream are
+# still per worker (in-memory RATE_LIMIT_STORAGE_URI, STATUS_STREAM_CHANGE_STREAM off).
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    # Workers share their Prometheus samples through this directory
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    gunicorn -c backend/gunicorn.conf.py backend.server:app &
+else
+    if [ "${PERF_PROFILE:-default}" = "fast" ]; then
+        uvicorn backend.server:app --host 0.0.0.0 --port 8001 --loop uvloop --http httptools &
+    else
+        uvicorn backend.server:app --host 0.0.0.0 --port 8001 &
+    fi
+fi
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
-
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+echo "Waiting for backend to become ready..."
+READY_URL="http://127.0.0.1:8001/api/ready"
+READY_TIMEOUT=${READY_TIMEOUT:-120}
+WAITED=0
+until wget -q -O /dev/null "$READY_URL" 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ "$WAITED" -ge "$READY_TIMEOUT" ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 1
+    WAITED=$((WAITED + 1))
+done
+echo "Backend ready after ${WAITED}s"
 
 # Start Nginx
 nginx -g 'daemon off;' &
 NGINX_PID=$!
 
 # Handle termination signals
-trap 'kill $BACKEND_PID $NGINX_PID; exit 0' SIGTERM SIGINT
+# SIGTERM lets uvicorn/gunicorn drain in-flight requests before exiting
+trap 'kill -TERM $BACKEND_PID $NGINX_PID; wait $BACKEND_PID; exit 0' TERM INT
 
 # Check if processes are still running
 while kill -0 $BACKEND_PID 2>/dev/null && kill -0 $NGINX_PID 2>/dev/null; do
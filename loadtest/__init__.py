@@ -0,0 +1,4 @@
+"""Async HTTP load generator for the API.
+
+Run ``python -m loadtest --help`` for options.
+"""
@@ -0,0 +1,88 @@
+"""Load test a running API deployment and print the results as JSON.
+
+Examples::
+
+    python -m loadtest --base-url http://localhost:8001/api --scenario status_ingest \\
+        --mode open --rate 200 --duration 60
+
+    LOADTEST_BASE_URL=https://staging.example.com/api python -m loadtest \\
+        --scenario status_ingest=3,login_mix=1,admin_listing=1 --mode closed --concurrency 50
+
+Scenarios: login_mix, status_ingest, admin_listing (weights after "=").
+Requests come from one address, so disable or raise the server's rate
+limits (RATE_LIMIT_ENABLED=false) unless they are what is being measured;
+rejected requests show up as status_429 errors.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from .runner import execute
+from .scenarios import SCENARIOS
+
+
+def parse_scenarios(value: str):
+    weighted = []
+    for entry in value.split(","):
+        name, _, weight = entry.strip().partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, choose from {', '.join(SCENARIOS)}")
+        weighted.append((name, float(weight or 1)))
+    return weighted
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], epilog=__doc__.split("\n", 2)[2],
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default=os.environ.get("LOADTEST_BASE_URL", "http://localhost:8001/api"),
+                        help="API base URL including /api (default: $LOADTEST_BASE_URL or %(default)s)")
+    parser.add_argument("--scenario", type=parse_scenarios, default=parse_scenarios("status_ingest"),
+                        help="scenario or weighted mix, e.g. status_ingest=3,login_mix=1")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed",
+                        help="closed: fixed concurrency; open: fixed arrival rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds run before measuring")
+    parser.add_argument("--concurrency", type=int, default=10, help="virtual users in closed mode")
+    parser.add_argument("--rate", type=float, default=50.0, help="iterations per second in open mode")
+    parser.add_argument("--max-in-flight", type=int, default=1000,
+                        help="open mode: iterations beyond this are skipped and counted")
+    parser.add_argument("--uniform", action="store_true", help="open mode: evenly spaced instead of Poisson arrivals")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--users", type=int, default=20, help="login_mix: accounts to register")
+    parser.add_argument("--clients", type=int, default=100, help="status_ingest: distinct client names")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    options = {"login_mix": {"users": args.users}, "status_ingest": {"clients": args.clients}}
+    weighted = [(SCENARIOS[name](**options.get(name, {})), weight) for name, weight in args.scenario]
+    result = asyncio.run(execute(
+        args.base_url.rstrip("/"), weighted, args.mode, args.duration,
+        warmup=args.warmup, concurrency=args.concurrency, rate=args.rate,
+        max_in_flight=args.max_in_flight, timeout=args.timeout, poisson=not args.uniform
+    ))
+    report = {
+        "config": {
+            "base_url": args.base_url,
+            "scenarios": dict(args.scenario),
+            "mode": args.mode,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            **({"concurrency": args.concurrency} if args.mode == "closed" else {"rate_per_s": args.rate}),
+        },
+        **result,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if result["iterations"]["count"] == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
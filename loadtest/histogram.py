@@ -0,0 +1,62 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+# Values keep their top SIGNIFICANT_BITS bits, i.e. under 1% relative error,
+# the same trade-off an HDR histogram with two significant digits makes
+SIGNIFICANT_BITS = 7
+
+
+def bucket(value: int) -> int:
+    """Round ``value`` down to SIGNIFICANT_BITS significant bits"""
+    shift = max(0, value.bit_length() - SIGNIFICANT_BITS)
+    return value >> shift << shift
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in microseconds with bounded relative error"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1e6))
+        self.counts[bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percent: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, round(percent / 100 * self.count))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+        return self.max
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 95, 99, 99.9)) -> Dict[str, float]:
+        """Latency summary in milliseconds"""
+        result = {
+            "count": self.count,
+            "min_ms": (self.min or 0) / 1000,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "max_ms": self.max / 1000,
+        }
+        for percent in percentiles:
+            result[f"p{percent:g}_ms"] = self.percentile(percent) / 1000
+        return result
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import time
+from typing import List, Sequence, Tuple
+
+import httpx
+
+from .histogram import LatencyHistogram
+from .scenarios import Scenario, Session
+
+
+class Mix:
+    """Weighted choice between scenarios for each iteration"""
+
+    def __init__(self, weighted: Sequence[Tuple[Scenario, float]]):
+        self.scenarios = [scenario for scenario, _ in weighted]
+        self.weights = [weight for _, weight in weighted]
+
+    def pick(self) -> Scenario:
+        return random.choices(self.scenarios, self.weights)[0]
+
+
+class Run:
+    def __init__(self, mix: Mix, session: Session):
+        self.mix = mix
+        self.session = session
+        self.iterations = LatencyHistogram()
+        self.failed_iterations = 0
+        self.skipped = 0
+
+    def reset(self) -> None:
+        self.session.reset()
+        self.iterations = LatencyHistogram()
+        self.failed_iterations = 0
+        self.skipped = 0
+
+    async def iterate(self, scheduled: float) -> None:
+        """Run one iteration; latency counts from ``scheduled`` so queueing delay is included"""
+        try:
+            await self.mix.pick().iteration(self.session)
+        except Exception:
+            self.failed_iterations += 1
+        self.iterations.record(time.perf_counter() - scheduled)
+
+
+async def closed_loop(run: Run, concurrency: int, duration: float) -> None:
+    """``concurrency`` virtual users each issuing their next iteration as soon as the last finishes"""
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await run.iterate(time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(run: Run, rate: float, duration: float, max_in_flight: int,
+                    poisson: bool = True) -> None:
+    """Start iterations at ``rate`` per second whether or not earlier ones have finished.
+
+    Arrivals are Poisson (or evenly spaced). Iterations that would exceed
+    ``max_in_flight`` are skipped and counted rather than queued, so a slow
+    server cannot slow the arrival rate down.
+    """
+    started = time.perf_counter()
+    deadline = started + duration
+    next_arrival = started
+    tasks: set = set()
+    while next_arrival < deadline:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            run.skipped += 1
+        else:
+            task = asyncio.create_task(run.iterate(next_arrival))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += random.expovariate(rate) if poisson else 1 / rate
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def execute(base_url: str, weighted: List[Tuple[Scenario, float]], mode: str, duration: float,
+                  warmup: float = 0.0, concurrency: int = 10, rate: float = 50.0,
+                  max_in_flight: int = 1000, timeout: float = 30.0, poisson: bool = True) -> dict:
+    limits = httpx.Limits(max_connections=concurrency if mode == "closed" else max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        session = Session(client)
+        for scenario, _ in weighted:
+            await scenario.setup(session)
+        run = Run(Mix(weighted), session)
+
+        async def phase(seconds):
+            if mode == "closed":
+                await closed_loop(run, concurrency, seconds)
+            else:
+                await open_loop(run, rate, seconds, max_in_flight, poisson)
+
+        if warmup > 0:
+            await phase(warmup)
+        run.reset()
+        started = time.perf_counter()
+        await phase(duration)
+        elapsed = time.perf_counter() - started
+
+    requests = {name: stats.to_dict() for name, stats in sorted(session.stats.items())}
+    total_requests = sum(stats["count"] for stats in requests.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "iterations": {
+            **run.iterations.summary(),
+            "failed": run.failed_iterations,
+            "skipped": run.skipped,
+            "rate_per_s": round(run.iterations.count / elapsed, 2),
+        },
+        "requests_per_s": round(total_requests / elapsed, 2),
+        "errors": sum(sum(stats["errors"].values()) for stats in requests.values()),
+        "requests": requests,
+    }
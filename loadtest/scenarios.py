@@ -0,0 +1,147 @@
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Iterable
+
+import httpx
+
+from .histogram import LatencyHistogram
+
+
+class RequestStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.ok = 0
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def to_dict(self) -> dict:
+        return {
+            **self.histogram.summary(),
+            "ok": self.ok,
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+            "errors": dict(self.errors),
+        }
+
+
+class Session:
+    """HTTP client that records latency and outcome per named request"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.stats: Dict[str, RequestStats] = {}
+
+    def reset(self) -> None:
+        self.stats = {}
+
+    async def request(self, name: str, method: str, path: str, expected: Iterable[int] = (200,),
+                      **kwargs) -> httpx.Response:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = RequestStats()
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            stats.histogram.record(time.perf_counter() - started)
+            stats.errors[type(e).__name__] += 1
+            raise
+        stats.histogram.record(time.perf_counter() - started)
+        stats.statuses[response.status_code] += 1
+        if response.status_code in expected:
+            stats.ok += 1
+        else:
+            stats.errors[f"status_{response.status_code}"] += 1
+        return response
+
+
+def unique_email(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:12]}@loadtest.example.com"
+
+
+class Scenario:
+    """One unit of user behaviour; ``iteration`` is what the runner schedules"""
+
+    name = ""
+
+    async def setup(self, session: Session) -> None:
+        pass
+
+    async def iteration(self, session: Session) -> None:
+        raise NotImplementedError
+
+
+class LoginMix(Scenario):
+    """Logins against a pool of registered users, some with a wrong password, then /auth/me"""
+
+    name = "login_mix"
+
+    def __init__(self, users: int = 20, failure_ratio: float = 0.1):
+        self.users = users
+        self.failure_ratio = failure_ratio
+        self.accounts = []
+
+    async def setup(self, session: Session) -> None:
+        for _ in range(self.users):
+            account = {"email": unique_email("login"), "password": "LoadTest123!"}
+            await session.request(
+                "setup.register", "POST", "/auth/register", expected=(201,),
+                json={**account, "full_name": "Load Test"}
+            )
+            self.accounts.append(account)
+
+    async def iteration(self, session: Session) -> None:
+        account = random.choice(self.accounts)
+        if random.random() < self.failure_ratio:
+            await session.request(
+                "login.bad_password", "POST", "/auth/login", expected=(401,),
+                json={"email": account["email"], "password": "wrong-password"}
+            )
+            return
+        response = await session.request("login", "POST", "/auth/login", json=account)
+        if response.status_code == 200:
+            token = response.json()["access_token"]
+            await session.request("auth.me", "GET", "/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+class StatusIngest(Scenario):
+    """Status check writes from a fixed set of clients with occasional listings"""
+
+    name = "status_ingest"
+
+    def __init__(self, clients: int = 100, read_ratio: float = 0.1):
+        self.clients = clients
+        self.read_ratio = read_ratio
+
+    async def iteration(self, session: Session) -> None:
+        client_name = f"loadtest-{random.randrange(self.clients)}"
+        await session.request("status.create", "POST", "/status", json={"client_name": client_name})
+        if random.random() < self.read_ratio:
+            await session.request("status.list", "GET", "/status")
+
+
+class AdminListing(Scenario):
+    """An admin paging through users and client heartbeats"""
+
+    name = "admin_listing"
+
+    def __init__(self):
+        self.headers = {}
+
+    async def setup(self, session: Session) -> None:
+        account = {"email": unique_email("admin"), "password": "LoadTest123!"}
+        await session.request(
+            "setup.register", "POST", "/auth/register", expected=(201,),
+            json={**account, "full_name": "Load Test Admin", "role": "admin"}
+        )
+        response = await session.request("setup.login", "POST", "/auth/login", json=account)
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def iteration(self, session: Session) -> None:
+        await session.request("users.list", "GET", "/users/", headers=self.headers)
+        await session.request("status.clients", "GET", "/status/clients", headers=self.headers)
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (LoginMix, StatusIngest, AdminListing)}
@@ -0,0 +1,73 @@
+import asyncio
+
+from backend.admission import AdaptiveLimit, AdmissionMiddleware, Lane, classify_request, create_lanes
+
+
+def slow_app(delay):
+    async def app(scope, receive, send):
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+
+async def fire(middleware, count, path="/api/status"):
+    statuses = []
+
+    async def one():
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+        await middleware({"type": "http", "path": path}, None, send)
+
+    await asyncio.gather(*(one() for _ in range(count)))
+    return statuses
+
+
+def test_sheds_beyond_limit_and_queue():
+    async def scenario():
+        lane = Lane("default", AdaptiveLimit(2, 1, 10, target_latency=1.0), max_queue=2, queue_timeout=1.0)
+        statuses = await fire(AdmissionMiddleware(slow_app(0.02), {"default": lane}), 10)
+        assert statuses.count(200) == 4
+        assert statuses.count(503) == 6
+        assert lane.in_flight == 0
+    asyncio.run(scenario())
+
+
+def test_queued_requests_time_out():
+    async def scenario():
+        lane = Lane("default", AdaptiveLimit(1, 1, 1, target_latency=1.0), max_queue=5, queue_timeout=0.01)
+        statuses = await fire(AdmissionMiddleware(slow_app(0.1), {"default": lane}), 3)
+        assert statuses.count(200) == 1
+        assert lane.rejected == 2
+    asyncio.run(scenario())
+
+
+def test_limit_adapts_to_latency():
+    limit = AdaptiveLimit(10, 2, 20, target_latency=0.1, cooldown=0)
+    limit.on_sample(0.5)
+    assert limit.limit == 9
+    for _ in range(50):
+        limit.on_sample(0.01)
+    assert limit.limit > 9
+
+
+def test_lanes_by_path():
+    assert classify_request("/api/health") == "health"
+    assert classify_request("/metrics") == "health"
+    assert classify_request("/api/status/export") == "export"
+    assert classify_request("/api/auth/login") == "auth"
+    assert classify_request("/api/users/") == "admin"
+    assert classify_request("/api/status") == "default"
+    assert classify_request("/api/status/stream") is None
+
+
+def test_exports_share_a_small_fixed_lane():
+    async def scenario():
+        lane = create_lanes()["export"]
+        statuses = await fire(AdmissionMiddleware(slow_app(0.05), {"export": lane}), 10, "/api/status/export")
+        return statuses, lane.limit.limit
+    statuses, limit = asyncio.run(scenario())
+    # Two running, four queued behind them; the rest are shed
+    assert statuses.count(200) == 6 and statuses.count(503) == 4
+    assert limit == 2
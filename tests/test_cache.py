@@ -0,0 +1,41 @@
+from backend.cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_until_write_invalidates():
+    cache = ResponseCache(max_staleness=10)
+    cache.set("k", b"[]", cache.generation)
+    assert cache.get("k").body == b"[]"
+
+    cache.invalidate()
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_entry_expires_after_max_staleness():
+    clock = FakeClock()
+    cache = ResponseCache(max_staleness=5, clock=clock)
+    cache.set("k", b"[]", cache.generation)
+    clock.now = 5.5
+    assert cache.get("k") is None
+
+
+def test_write_during_query_is_not_cached():
+    cache = ResponseCache(max_staleness=10)
+    generation = cache.generation
+    cache.invalidate()
+    cache.set("k", b"[]", generation)
+    assert cache.get("k") is None
+
+
+def test_disabled_cache_never_hits():
+    cache = ResponseCache(max_staleness=0)
+    cache.set("k", b"[]", cache.generation)
+    assert cache.get("k") is None
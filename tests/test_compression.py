@@ -0,0 +1,134 @@
+import asyncio
+import gzip
+import threading
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend.cache import ResponseCache
+from backend.compression import CompressionMiddleware, Compressor, parse_accept_encoding
+
+BODY = b'{"items": "' + b"x" * 4096 + b'"}'
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0, *;q=0.1, zstd;q=bad") == {
+        "gzip": 1.0, "br": 0.5, "identity": 0.0, "*": 0.1, "zstd": 0.0
+    }
+    assert parse_accept_encoding(" GZIP ,, ") == {"gzip": 1.0}
+
+
+def test_negotiate_by_q_value_then_server_preference():
+    compressor = Compressor(encodings=["zstd", "br", "gzip"])
+    assert compressor.negotiate(None) is None
+    assert compressor.negotiate("gzip, br") == "br"
+    assert compressor.negotiate("gzip, br;q=0.5") == "gzip"
+    assert compressor.negotiate("identity;q=0, gzip") == "gzip"
+    assert compressor.negotiate("*") == "zstd"
+    assert compressor.negotiate("*;q=0.5, zstd;q=0, br;q=0") == "gzip"
+    assert compressor.negotiate("gzip;q=0, identity") is None
+    assert Compressor(encodings=["gzip"]).negotiate("br") is None
+
+
+def make_client(**options):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, compressor=Compressor(encodings=["gzip"], **options))
+
+    @app.get("/json")
+    async def json_body():
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield BODY
+            yield BODY
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(BODY, media_type="image/png")
+
+    return TestClient(app)
+
+
+def test_middleware_compresses_complete_json_bodies():
+    response = make_client().get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == BODY
+
+
+def test_middleware_skips_small_encoded_streaming_and_binary_bodies():
+    client = make_client()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.content == b'{"ok": true}'
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip" and encoded.content == BODY
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in stream.headers and stream.content == BODY * 2
+    image = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in image.headers
+    identity = client.get("/json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+
+
+def test_large_bodies_are_compressed_off_the_event_loop():
+    compressor = Compressor(encodings=["gzip"], offload_size=len(BODY))
+    threads = []
+    compress = compressor.compress
+    compressor.compress = lambda body, encoding: threads.append(threading.get_ident()) or compress(body, encoding)
+
+    async def scenario():
+        await compressor.compress_async(BODY[:100], "gzip")
+        await compressor.compress_async(BODY, "gzip")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads[0] == loop_thread and threads[1] != loop_thread
+
+
+def test_cached_response_compresses_each_encoding_once():
+    compressor = Compressor(encodings=["gzip"])
+    cache = ResponseCache()
+    entry = cache.set("key", BODY, cache.generation)
+
+    async def scenario():
+        first = await compressor.cached_response(entry, "gzip")
+        second = await compressor.cached_response(entry, "gzip")
+        plain = await compressor.cached_response(entry, None)
+        return first, second, plain
+
+    first, second, plain = asyncio.run(scenario())
+    assert first.body is second.body and gzip.decompress(first.body) == BODY
+    assert first.headers["content-encoding"] == "gzip" and "content-encoding" not in plain.headers
+    assert list(entry.variants) == ["gzip"]
+
+
+def test_event_stream_headers_are_sent_before_the_first_event():
+    sent = []
+
+    async def events(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        # A stream may wait a long time for its first event; the client needs the headers now
+        assert [message["type"] for message in sent] == ["http.response.start"]
+        await send({"type": "http.response.body", "body": b"data: x\n\n" * 200, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = CompressionMiddleware(events, Compressor(encodings=["gzip"]))
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(middleware(scope, None, send))
+    assert len(sent) == 3 and dict(sent[0]["headers"]) == {b"content-type": b"text/event-stream"}
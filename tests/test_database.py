@@ -0,0 +1,108 @@
+import asyncio
+import logging
+
+import pytest
+from pymongo import IndexModel
+
+from backend import database
+from backend.database import (
+    build_read_preference, create_indexes, declared_indexes, read_database, reconcile_collection_indexes,
+    route_read_preference
+)
+from benchmarks.fake_motor import FakeDatabase
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(database.db_instance, "database", db)
+    return db
+
+
+def count_create_indexes_calls(db):
+    calls = []
+    for name in declared_indexes():
+        collection = db[name]
+        create = collection.create_indexes
+
+        async def counted(models, create=create, name=name):
+            calls.append(name)
+            return await create(models)
+        collection.create_indexes = counted
+    return calls
+
+
+def index_names(db, collection):
+    return [index["name"] for index in db[collection].indexes]
+
+
+def test_missing_indexes_are_created_once_per_collection(fake_db, monkeypatch):
+    monkeypatch.setenv("MONGO_INDEX_MODE", "always")
+    calls = count_create_indexes_calls(fake_db)
+    asyncio.run(create_indexes())
+    assert sorted(calls) == sorted(declared_indexes())
+    assert index_names(fake_db, "users") == ["_id_", "email_1", "created_at_1", "role_1"]
+
+    # Everything is in place now, so a second run sends no createIndexes at all
+    calls.clear()
+    asyncio.run(create_indexes())
+    assert calls == []
+
+
+def test_never_mode_skips_reconciliation(fake_db, monkeypatch):
+    monkeypatch.setenv("MONGO_INDEX_MODE", "never")
+    asyncio.run(create_indexes())
+    assert index_names(fake_db, "users") == ["_id_"]
+
+
+def test_changed_index_options_are_reported(fake_db, caplog):
+    keys = fake_db["idempotency_keys"]
+    keys.indexes.append({"name": "created_at_1", "key": {"created_at": 1}, "expireAfterSeconds": 60})
+    keys.indexes.append({"name": "fingerprint_1", "key": {"fingerprint": 1}, "unique": True})
+    declared = [
+        IndexModel("created_at", expireAfterSeconds=3600),
+        IndexModel("fingerprint"),
+        IndexModel("state"),
+    ]
+    with caplog.at_level(logging.WARNING, logger="backend.database"):
+        created = asyncio.run(reconcile_collection_indexes(fake_db, "idempotency_keys", declared))
+    assert created == ["state_1"]
+    warnings = [record.getMessage() for record in caplog.records]
+    assert len(warnings) == 2
+    assert "created_at_1 has expireAfterSeconds=60, declared 3600" in warnings[0]
+    assert "fingerprint_1 has unique=True, declared False" in warnings[1]
+
+
+def test_read_routing_parses_routes_and_falls_back_to_primary(monkeypatch):
+    monkeypatch.setenv("MONGO_READ_ROUTING", " users.list = secondaryPreferred,status.export=secondary,,bad,x=fastest")
+    assert route_read_preference("users.list") == "secondaryPreferred"
+    assert route_read_preference("status.export") == "secondary"
+    assert route_read_preference("status.list") == "primary"
+    assert route_read_preference("x") == "primary"
+
+
+def test_max_staleness_is_raised_to_the_server_minimum(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_STALENESS_SECONDS", "30")
+    assert build_read_preference("secondary").max_staleness == 90
+    monkeypatch.setenv("MONGO_MAX_STALENESS_SECONDS", "120")
+    assert build_read_preference("nearest").max_staleness == 120
+    monkeypatch.delenv("MONGO_MAX_STALENESS_SECONDS")
+    assert build_read_preference("secondaryPreferred").max_staleness == -1
+    assert build_read_preference("primary").mode == 0
+
+
+def test_read_database_builds_one_handle_per_mode(fake_db, monkeypatch):
+    monkeypatch.setenv("MONGO_READ_ROUTING", "users.list=secondary,status.export=secondary,users.get=nearest")
+    monkeypatch.setattr(database.db_instance, "read_databases", {})
+    built = []
+    fake_db.with_options = lambda read_preference: built.append(read_preference.mongos_mode) or object()
+
+    async def scenario():
+        dependencies = [read_database(route) for route in ("users.list", "status.export", "users.get", "status.list")]
+        return [await dependency() for dependency in dependencies + dependencies]
+
+    handles = asyncio.run(scenario())
+    assert built == ["secondary", "nearest"]
+    assert handles[0] is handles[1] is handles[4] is handles[5]
+    assert handles[2] is handles[6] and handles[2] is not handles[0]
+    assert handles[3] is handles[7] is fake_db
@@ -0,0 +1,28 @@
+import random
+from datetime import datetime
+
+from backend.datagen import merge_summaries, status_check_batch, summarize_heartbeats
+
+
+def test_heartbeat_summaries_match_generated_checks():
+    options = {"client_names": ["a", "b", "c"], "cumulative_weights": [1, 2, 3], "days": 1, "time_skew": 1.0}
+    rng = random.Random(0)
+    batches = [status_check_batch(0, 500, rng=rng, **options) for _ in range(3)]
+
+    total = {}
+    for batch in batches:
+        summary = {}
+        summarize_heartbeats(batch, summary)
+        merge_summaries(total, summary)
+
+    docs = [doc for batch in batches for doc in batch]
+    for name, (checks, last_seen) in total.items():
+        mine = [doc["timestamp"] for doc in docs if doc["client_name"] == name]
+        assert checks == len(mine) and last_seen == max(mine)
+    assert sum(checks for checks, _ in total.values()) == 1500
+
+
+def test_merge_keeps_latest_timestamp():
+    total = {"a": [2, datetime(2024, 1, 2)]}
+    merge_summaries(total, {"a": [1, datetime(2024, 1, 1)], "b": [3, datetime(2024, 1, 3)]})
+    assert total == {"a": [3, datetime(2024, 1, 2)], "b": [3, datetime(2024, 1, 3)]}
@@ -0,0 +1,52 @@
+import asyncio
+import contextvars
+import logging
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.db_profiler import CommandProfiler, DBProfilerMiddleware, command_shape
+
+
+def event(request_id, command_name="find", command=None, duration_ms=1.0):
+    return SimpleNamespace(
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+        command_name=command_name,
+        command=command or {command_name: "users", "filter": {}},
+        duration_micros=int(duration_ms * 1000),
+    )
+
+
+def test_command_shape_hides_values():
+    find = {"find": "users", "filter": {"email": "a@example.com", "age": {"$gt": 30}, "id": {"$in": [1, 2, 3]}}}
+    assert command_shape("find", find) == {"email": "?", "age": {"$gt": "?"}, "id": {"$in": ["?"]}}
+    update = {"update": "users", "updates": [{"q": {"id": "abc"}, "u": {"$set": {"name": "x"}}}]}
+    assert command_shape("update", update) == {"id": "?"}
+    assert command_shape("insert", {"insert": "users"}) is None
+
+
+def test_counts_commands_per_request_and_logs_slow_ones(caplog):
+    profiler = CommandProfiler(slow_query_ms=50)
+    app = FastAPI()
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: str):
+        def run_command(request_id, duration_ms):
+            profiler.started(event(request_id))
+            profiler.succeeded(event(request_id, duration_ms=duration_ms))
+        # Commands are reported from executor threads, as Motor does
+        loop = asyncio.get_running_loop()
+        for request_id, duration_ms in enumerate((2.0, 3.0, 80.0)):
+            context = contextvars.copy_context()
+            await loop.run_in_executor(None, context.run, run_command, request_id, duration_ms)
+        return {}
+
+    app.add_middleware(DBProfilerMiddleware, headers=True)
+    with caplog.at_level(logging.WARNING, logger="backend.db_profiler"):
+        response = TestClient(app).get("/users/1")
+    assert response.headers["x-db-calls"] == "3"
+    assert response.headers["x-db-time"] == "85.0"
+    slow = [r.getMessage() for r in caplog.records if r.name == "backend.db_profiler"]
+    assert len(slow) == 1 and "find on users took 80.0 ms (request /users/1)" in slow[0]
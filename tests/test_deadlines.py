@@ -0,0 +1,129 @@
+import asyncio
+
+import pymongo
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout, OperationFailure, PyMongoError
+
+from backend.deadlines import DeadlineMiddleware, mongo_timeout_handler, outside_deadline
+from backend.idempotency import IdempotencyStore
+from backend.models import StatusCheck, StatusCheckCreate
+from benchmarks.fake_motor import FakeDatabase
+
+
+class DeadlineAwareDatabase:
+    """FakeDatabase whose operations fail once pymongo.timeout has run out, as pymongo's do"""
+
+    def __init__(self):
+        self.db = FakeDatabase()
+
+    def __getattr__(self, name):
+        return DeadlineAwareCollection(self.db[name])
+
+
+class DeadlineAwareCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            remaining = _csot.remaining()
+            if remaining is not None and remaining <= 0:
+                raise ExecutionTimeout("operation exceeded time limit", 50)
+            return await method(*args, **kwargs)
+        return call
+
+
+def make_client(**options):
+    app = FastAPI()
+    app.add_exception_handler(PyMongoError, mongo_timeout_handler)
+    app.add_middleware(DeadlineMiddleware, **options)
+    app.state.seen_timeouts = []
+
+    @app.get("/api/timeout")
+    async def timeout():
+        app.state.seen_timeouts.append(_csot.get_timeout())
+        return {}
+
+    @app.get("/api/fail/{kind}")
+    async def fail(kind: str):
+        if kind == "timeout":
+            raise ExecutionTimeout("operation exceeded time limit", 50)
+        raise OperationFailure("boom", 2)
+
+    return app, TestClient(app, raise_server_exceptions=False)
+
+
+def test_budget_from_route_prefix_header_and_default():
+    app, client = make_client(default_ms=1000, routes={"/api": 2000, "/api/time": 0}, min_ms=100, max_ms=5000)
+    middleware = DeadlineMiddleware(None, default_ms=1000, routes={"/api": 2000, "/api/stream": 0},
+                                    min_ms=100, max_ms=5000)
+
+    def scope(path, header=None):
+        return {"path": path, "headers": [(b"x-request-timeout-ms", header)] if header else []}
+
+    assert middleware.budget_ms(scope("/other")) == 1000
+    assert middleware.budget_ms(scope("/api/users")) == 2000
+    assert middleware.budget_ms(scope("/api/stream")) == 0
+    assert middleware.budget_ms(scope("/api/users", b"10")) == 100
+    assert middleware.budget_ms(scope("/api/users", b"99999")) == 5000
+    assert middleware.budget_ms(scope("/api/users", b"soon")) == 2000
+
+    client.get("/api/timeout", headers={"X-Request-Timeout-Ms": "300"})
+    client.get("/api/timeout")
+    # /api/time is a prefix of /api/timeout with a 0 budget: no pymongo.timeout at all
+    assert app.state.seen_timeouts == [0.3, None]
+
+
+def test_mongo_timeouts_answer_504_and_other_errors_500():
+    _, client = make_client()
+    response = client.get("/api/fail/timeout")
+    assert response.status_code == 504 and response.json() == {"detail": "Request deadline exceeded"}
+    assert client.get("/api/fail/other").status_code == 500
+
+
+def test_outside_deadline_runs_after_the_deadline_has_passed():
+    async def scenario():
+        db = DeadlineAwareDatabase()
+        with pymongo.timeout(0.01):
+            await asyncio.sleep(0.02)
+            await outside_deadline(lambda: db.items.insert_one({"_id": 1}))
+            try:
+                await db.items.insert_one({"_id": 2})
+            except ExecutionTimeout:
+                pass
+        return sorted(db.db["items"].docs)
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_request_that_ran_out_of_time_can_be_retried_with_its_key():
+    db = DeadlineAwareDatabase()
+    store = IdempotencyStore()
+    app = FastAPI()
+    app.add_exception_handler(PyMongoError, mongo_timeout_handler)
+    app.add_middleware(DeadlineMiddleware, min_ms=10)
+    attempts = []
+
+    @app.post("/api/status")
+    async def create(payload: StatusCheckCreate):
+        async def handler():
+            attempts.append(1)
+            if len(attempts) == 1:
+                await asyncio.sleep(0.1)
+            status_check = StatusCheck(**payload.model_dump())
+            await db.status_checks.insert_one(status_check.model_dump())
+            return status_check
+
+        return await store.run(db, "status", "retry-key", payload, handler)
+
+    client = TestClient(app, raise_server_exceptions=False)
+    headers = {"X-Request-Timeout-Ms": "20"}
+    assert client.post("/api/status", json={"client_name": "a"}, headers=headers).status_code == 504
+    retried = client.post("/api/status", json={"client_name": "a"}, headers=headers)
+    assert retried.status_code == 200 and retried.json()["client_name"] == "a"
+    assert len(attempts) == 2
+    assert client.post("/api/status", json={"client_name": "a"}).headers["idempotent-replayed"] == "true"
@@ -0,0 +1,76 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from backend.export import _ChunkSink, export_status_checks
+from benchmarks.fake_motor import FakeDatabase
+
+START = datetime(2024, 1, 1)
+
+
+def make_db(count=10):
+    db = FakeDatabase()
+    db["status_checks"].docs.update({
+        i: {"_id": i, "id": f"check-{i}", "client_name": f"client-{i % 3}", "timestamp": START + timedelta(hours=i)}
+        for i in range(count)
+    })
+    return db
+
+
+def export(db, fmt, **options):
+    async def scenario():
+        return [chunk async for chunk in export_status_checks(db, fmt, batch_size=3, **options)]
+    return asyncio.run(scenario())
+
+
+def test_chunk_sink_hands_back_written_bytes_once():
+    sink = _ChunkSink()
+    sink.write(b"abc")
+    sink.write(memoryview(b"de"))
+    assert sink.tell() == 5 and sink.drain() == b"abcde" and sink.drain() == b""
+    sink.write(b"footer")
+    sink.close()
+    # Whatever the writer wrote while closing is still drained afterwards
+    assert sink.closed and sink.drain() == b"footer" and sink.tell() == 11
+
+
+def test_parquet_export_streams_one_row_group_per_batch():
+    chunks = export(make_db(), "parquet")
+    # The footer is only written by writer.close(), so it arrives in the last chunk
+    assert len(chunks) > 2 and chunks[-1].endswith(b"PAR1")
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.metadata.num_row_groups == 4
+    table = parquet.read()
+    assert table.column("id").to_pylist() == [f"check-{i}" for i in range(10)]
+    assert table.column("client_name").to_pylist()[:4] == ["client-0", "client-1", "client-2", "client-0"]
+    assert table.column("timestamp").to_pylist()[-1] == START + timedelta(hours=9)
+    assert pq.read_table(io.BytesIO(b"".join(chunks))).num_rows == 10
+
+
+def test_arrow_export_filters_start_inclusive_end_exclusive():
+    chunks = export(make_db(), "arrow", start=START + timedelta(hours=2), end=START + timedelta(hours=7))
+    reader = pa.ipc.open_stream(b"".join(chunks))
+    batches = list(reader)
+    table = pa.Table.from_batches(batches)
+    assert [batch.num_rows for batch in batches] == [3, 2]
+    assert table.column("id").to_pylist() == [f"check-{i}" for i in range(2, 7)]
+    assert table.schema.field("client_name").type == pa.dictionary(pa.int32(), pa.string())
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_empty_export_is_a_valid_file(fmt):
+    data = b"".join(export(make_db(), fmt, start=START + timedelta(days=1)))
+    if fmt == "parquet":
+        table = pq.read_table(io.BytesIO(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 0 and table.column_names == ["id", "client_name", "timestamp"]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        export(make_db(), "csv")
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from backend.heartbeats import LastSeenIndex
+from backend.models import StatusCheckCreate
+from benchmarks.fake_motor import FakeDatabase
+
+
+def test_record_mirrors_local_writes():
+    async def scenario():
+        db, heartbeats = FakeDatabase(), LastSeenIndex()
+        await heartbeats.record(db, "a", datetime(2024, 1, 1))
+        return heartbeats.checks, (await db.client_heartbeats.find_one({"client_name": "a"}))["checks"]
+
+    assert asyncio.run(scenario()) == ({"a": 1}, 1)
+
+
+def test_change_stream_fed_mirror_counts_each_insert_once():
+    async def scenario():
+        db, heartbeats = FakeDatabase(), LastSeenIndex(mirror_writes=False)
+        await heartbeats.record(db, "a", datetime(2024, 1, 1))
+        # The change stream then delivers the same insert back to this worker
+        heartbeats.observe("a", datetime(2024, 1, 1))
+        return heartbeats.checks
+
+    assert asyncio.run(scenario()) == {"a": 1}
+
+
+def test_failed_status_check_insert_records_no_heartbeat():
+    from backend import server
+
+    class FailingStatusChecks:
+        async def insert_one(self, doc):
+            raise RuntimeError("insert failed")
+
+    async def scenario():
+        db = FakeDatabase()
+        db._collections["status_checks"] = FailingStatusChecks()
+        with pytest.raises(RuntimeError):
+            await server.create_status_check(
+                SimpleNamespace(), StatusCheckCreate(client_name="failing-client"), db, None
+            )
+        return await db.client_heartbeats.find_one({"client_name": "failing-client"})
+
+    assert asyncio.run(scenario()) is None
+    assert "failing-client" not in server.heartbeats.checks
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from backend.idempotency import IdempotencyStore
+from backend.models import StatusCheck, StatusCheckCreate
+from benchmarks.fake_motor import FakeDatabase
+
+
+class Handler:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("handler failed")
+        return StatusCheck(client_name="a")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_replays_completed_key_from_cache_and_database():
+    async def scenario():
+        db, store, handler = FakeDatabase(), IdempotencyStore(), Handler()
+        payload = StatusCheckCreate(client_name="a")
+        first = await store.run(db, "status", "k1", payload, handler)
+        replayed = await store.run(db, "status", "k1", payload, handler)
+        # A worker that has not seen the key reads the stored response from Mongo
+        from_db = await IdempotencyStore().run(db, "status", "k1", payload, handler)
+        return handler.calls, first, replayed, from_db
+
+    calls, first, replayed, from_db = run(scenario())
+    assert calls == 1
+    assert replayed.body == from_db.body == first.body
+    assert replayed.headers["idempotent-replayed"] == from_db.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_in_progress_key_answers_409():
+    async def scenario():
+        db, store = FakeDatabase(), IdempotencyStore()
+        payload = StatusCheckCreate(client_name="a")
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return StatusCheck(client_name="a")
+
+        first = asyncio.create_task(store.run(db, "status", "k1", payload, slow))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as conflict:
+            await store.run(db, "status", "k1", payload, Handler())
+        release.set()
+        await first
+        return conflict.value.status_code
+
+    assert run(scenario()) == 409
+
+
+def test_same_key_with_different_payload_answers_422():
+    async def scenario():
+        db, handler = FakeDatabase(), Handler()
+        await IdempotencyStore().run(db, "status", "k1", StatusCheckCreate(client_name="a"), handler)
+        codes = []
+        for store in (IdempotencyStore(), IdempotencyStore()):
+            # The second store has an empty front cache and compares against Mongo
+            with pytest.raises(HTTPException) as mismatch:
+                await store.run(db, "status", "k1", StatusCheckCreate(client_name="b"), handler)
+            codes.append(mismatch.value.status_code)
+        return codes, handler.calls
+
+    assert run(scenario()) == ([422, 422], 1)
+
+
+def test_takes_over_an_expired_lease():
+    async def scenario():
+        db, store, handler = FakeDatabase(), IdempotencyStore(lease_seconds=60), Handler()
+        payload = StatusCheckCreate(client_name="a")
+        await db.idempotency_keys.insert_one({
+            "_id": "status:k1",
+            "fingerprint": store.fingerprint(payload),
+            "state": "in_progress",
+            "created_at": datetime.utcnow() - timedelta(seconds=61)
+        })
+        await store.run(db, "status", "k1", payload, handler)
+        return handler.calls, (await db.idempotency_keys.find_one({"_id": "status:k1"}))["state"]
+
+    assert run(scenario()) == (1, "completed")
+
+
+def test_failed_request_releases_its_key():
+    async def scenario():
+        db, store = FakeDatabase(), IdempotencyStore()
+        payload = StatusCheckCreate(client_name="a")
+        with pytest.raises(RuntimeError):
+            await store.run(db, "status", "k1", payload, Handler(fail=True))
+        released = await db.idempotency_keys.find_one({"_id": "status:k1"}) is None
+        handler = Handler()
+        await store.run(db, "status", "k1", payload, handler)
+        return released, handler.calls
+
+    assert run(scenario()) == (True, 1)
+
+
+def test_failure_after_the_insert_keeps_the_key_so_the_retry_does_not_insert_again():
+    from backend import server
+
+    async def scenario():
+        db = FakeDatabase()
+        heartbeats = db.client_heartbeats
+        update_one = heartbeats.update_one
+        failures = [RuntimeError("heartbeat upsert failed")]
+
+        async def flaky_update_one(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return await update_one(*args, **kwargs)
+
+        heartbeats.update_one = flaky_update_one
+        payload = StatusCheckCreate(client_name="retried-client")
+        with pytest.raises(RuntimeError):
+            await server.create_status_check(SimpleNamespace(), payload, db, "retry-after-insert")
+        retried = await server.create_status_check(SimpleNamespace(), payload, db, "retry-after-insert")
+        return len(db.status_checks.docs), retried.headers.get("idempotent-replayed")
+
+    assert run(scenario()) == (1, "true")
@@ -0,0 +1,23 @@
+from benchmarks.bench_importtime import FORBIDDEN, by_package, parse, run, total_us
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     encodings.idna
+import time:       300 |        420 |   jose.jwt
+import time:        80 |        500 | jose
+import time:      1000 |       1000 |   backend.models
+import time:       250 |       1750 | backend
+"""
+
+
+def test_parse_and_totals():
+    rows = parse(SAMPLE)
+    assert [row["module"] for row in rows] == ["encodings.idna", "jose.jwt", "jose", "backend.models", "backend"]
+    assert total_us(rows, "backend") == 1750
+    assert by_package(rows) == {"backend": 1250, "jose": 380, "encodings": 120}
+
+
+def test_server_import_leaves_optional_dependencies_unloaded():
+    # Only the forbidden list; the time budget is gated by python -m benchmarks.bench_importtime
+    result = run("backend.server", runs=1, top=5, forbidden=list(FORBIDDEN))
+    assert result["forbidden"] == []
@@ -0,0 +1,23 @@
+import random
+
+from loadtest.histogram import LatencyHistogram
+
+
+def test_percentiles_within_one_percent():
+    values = [random.uniform(0.0005, 2.0) for _ in range(10000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for percent in (50, 90, 99, 99.9):
+        exact_ms = values[round(percent / 100 * len(values)) - 1] * 1000
+        assert abs(histogram.percentile(percent) / 1000 - exact_ms) <= exact_ms * 0.01 + 0.001
+
+
+def test_merge_combines_counts():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(0.001)
+    second.record(0.5)
+    first.merge(second)
+    summary = first.summary()
+    assert summary["count"] == 2 and summary["min_ms"] == 1.0 and summary["max_ms"] == 500.0
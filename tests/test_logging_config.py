@@ -0,0 +1,83 @@
+import io
+import json
+import logging
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.logging_config import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    RequestIdFilter,
+    RequestIdMiddleware,
+    SamplingFilter,
+)
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_json_records_carry_request_id():
+    output = io.StringIO()
+    stream = logging.StreamHandler(output)
+    stream.setFormatter(JsonFormatter())
+    handler = BoundedQueueHandler(stream)
+    handler.addFilter(RequestIdFilter())
+    logger = make_logger("test.request_id", handler)
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def index():
+        logger.info("handled %s", "index", extra={"user_id": "u1"})
+        return {}
+
+    app.add_middleware(RequestIdMiddleware)
+    client = TestClient(app)
+    response = client.get("/", headers={"X-Request-ID": "abc-123"})
+    generated = client.get("/").headers["x-request-id"]
+    handler.stop()
+
+    assert response.headers["x-request-id"] == "abc-123"
+    first, second = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert first["message"] == "handled index"
+    assert first["request_id"] == "abc-123" and first["user_id"] == "u1"
+    assert second["request_id"] == generated
+
+
+def test_rate_limits_info_but_not_warnings():
+    output = io.StringIO()
+    handler = BoundedQueueHandler(logging.StreamHandler(output))
+    handler.addFilter(SamplingFilter(rate_limits={"routes.auth": 5}))
+    logger = make_logger("backend.routes.auth", handler)
+    for _ in range(20):
+        logger.info("login")
+    logger.warning("failed")
+    handler.stop()
+    lines = output.getvalue().splitlines()
+    assert lines.count("login") <= 10 and "failed" in lines
+
+
+def test_full_queue_drops_instead_of_blocking():
+    class Stuck(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.unblocked = threading.Event()
+
+        def emit(self, record):
+            self.unblocked.wait()
+
+    target = Stuck()
+    handler = BoundedQueueHandler(target, maxsize=2)
+    logger = make_logger("test.dropping", handler)
+    for i in range(10):
+        logger.info("record %d", i)
+    assert handler.dropped >= 7
+    target.unblocked.set()
+    handler.stop()
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+import time
+
+from backend.loop_monitor import LoopMonitor
+
+
+def test_reports_blocking_callback_with_route(caplog):
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.05)
+
+        def handler(scope):
+            time.sleep(0.3)
+
+        handler({"type": "http", "path": "/api/users/"})
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    with caplog.at_level(logging.WARNING, logger="backend.loop_monitor"):
+        monitor = asyncio.run(scenario())
+    assert monitor.stalls == 1
+    [record] = [r for r in caplog.records if r.name == "backend.loop_monitor"]
+    message = record.getMessage()
+    assert "route /api/users/" in message and "in handler" in message
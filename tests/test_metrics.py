@@ -0,0 +1,61 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from backend.metrics import MetricsMiddleware, RouteResolver, metrics_response
+from backend.pool_metrics import PoolMetrics
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    @app.get("/metrics")
+    async def metrics():
+        return metrics_response()
+
+    app.add_middleware(MetricsMiddleware, resolver=RouteResolver(app))
+    return TestClient(app)
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") and all(part in line for part in wanted.split(",")):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_requests_labelled_by_route_template():
+    client = make_client()
+    before = client.get("/metrics").text
+    for i in range(3):
+        client.get(f"/items/{i}")
+    client.get("/items/missing")
+    client.get("/nowhere")
+    after = client.get("/metrics").text
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_requests_total", route="/items/{item_id}", status="200") == 3
+    assert delta("http_requests_total", route="/items/{item_id}", status="404") == 1
+    assert delta("http_requests_total", route="unmatched", status="404") == 1
+    assert delta("http_request_duration_seconds_count", route="/items/{item_id}") == 4
+    assert sample(after, "http_requests_in_progress", route="/items/{item_id}") == 0
+
+
+def test_pool_snapshot_reads_checkout_latency_from_prometheus():
+    pool = PoolMetrics()
+    before = pool.snapshot()["checkout_latency_seconds"]
+    for _ in range(2):
+        pool.connection_check_out_started(None)
+        pool.connection_checked_out(None)
+    after = pool.snapshot()["checkout_latency_seconds"]
+    assert after["count"] - before["count"] == 2
+    assert after["buckets"]["+Inf"] - before["buckets"]["+Inf"] == 2
+    assert 0 <= after["max"] <= after["sum"]
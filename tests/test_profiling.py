@@ -0,0 +1,42 @@
+import json
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.profiling import ProfileStore, ProfilerMiddleware
+
+
+def make_client(store, **options):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        deadline = time.perf_counter() + 0.01
+        while time.perf_counter() < deadline:
+            pass
+        return {"id": item_id}
+
+    app.add_middleware(ProfilerMiddleware, store=store, **options)
+    return TestClient(app)
+
+
+def test_profiles_requests_with_secret_header(tmp_path):
+    client = make_client(ProfileStore(str(tmp_path)), secret="s3cret")
+    client.get("/items/1")
+    client.get("/items/1", headers={"X-Profile": "wrong"})
+    assert os.listdir(tmp_path) == []
+
+    client.get("/items/1", headers={"X-Profile": "s3cret"})
+    [name] = os.listdir(tmp_path)
+    assert name.endswith("-items_item_id.speedscope.json")
+    with open(tmp_path / name) as f:
+        assert "speedscope" in json.load(f)["$schema"]
+
+
+def test_keeps_only_newest_profiles(tmp_path):
+    client = make_client(ProfileStore(str(tmp_path), max_files=2), sample_rate=1.0)
+    for i in range(4):
+        client.get(f"/items/{i}")
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,102 @@
+import asyncio
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+
+from backend.ratelimit import MemoryGCRA, Rate, RateLimiter, RedisGCRA
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_parse_rate():
+    assert Rate.parse("20/minute") == Rate(limit=20, period=60)
+    assert Rate.parse("100/2 hours") == Rate(limit=100, period=7200)
+
+
+def test_memory_limiter_allows_burst_then_rejects():
+    async def scenario():
+        limiter = RateLimiter(MemoryGCRA())
+        rate = Rate.parse("5/minute")
+        results = [await limiter.hit("k", rate) for _ in range(6)]
+        assert results[:5] == [None] * 5
+        assert 0 < results[5] <= 12
+    run(scenario())
+
+
+def test_reservation_decides_locally():
+    async def scenario():
+        limiter = RateLimiter(MemoryGCRA(), reserve_fraction=0.1, max_reserve=10)
+        rate = Rate.parse("1000/second")
+        for _ in range(100):
+            assert await limiter.hit("k", rate) is None
+        assert limiter.backend_calls == 10
+    run(scenario())
+
+
+def test_reservations_never_exceed_shared_limit():
+    async def scenario():
+        backend = MemoryGCRA()
+        workers = [RateLimiter(backend, reserve_fraction=0.2, max_reserve=5) for _ in range(3)]
+        rate = Rate.parse("20/minute")
+        allowed = 0
+        for i in range(60):
+            if await workers[i % 3].hit("k", rate) is None:
+                allowed += 1
+        assert allowed <= 20
+    run(scenario())
+
+
+@pytest.fixture
+def redis_url():
+    binary = shutil.which("redis-server")
+    if binary is None:
+        pytest.skip("redis-server is not installed")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [binary, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield f"redis://127.0.0.1:{port}/0"
+    process.terminate()
+    process.wait()
+
+
+def test_redis_limit_is_shared_across_workers(redis_url):
+    async def scenario():
+        workers = [RateLimiter(RedisGCRA(redis_url), reserve_fraction=0.1, max_reserve=5) for _ in range(4)]
+        rate = Rate.parse("50/minute")
+        allowed = 0
+        for i in range(200):
+            if await workers[i % 4].hit("k", rate) is None:
+                allowed += 1
+        # Tokens still held in other workers' reservations may go unused
+        assert 50 - 4 * 4 <= allowed <= 50
+        for worker in workers:
+            await worker.close()
+    run(scenario())
+
+
+def test_redis_reservation_decides_locally(redis_url):
+    # The cost of a local decision is tracked by benchmarks/bench_hotpaths.py
+    async def scenario():
+        limiter = RateLimiter(RedisGCRA(redis_url), max_reserve=50)
+        rate = Rate.parse("1000000/second")
+        for _ in range(50):
+            assert await limiter.hit("k", rate) is None
+        assert limiter.backend_calls == 1
+        await limiter.close()
+    run(scenario())
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from backend import responses
+from backend.models import Token, User, UserRole
+from backend.responses import ORJSONModelResponse, default_response_class
+
+
+class Event(BaseModel):
+    id: UUID
+    at: datetime
+    kind: str = Field(alias="type")
+
+
+class Feed(BaseModel):
+    events: List[Event]
+    latest: Optional[Event] = None
+    owner: User
+
+
+def render_both(content):
+    # FastAPI passes content through jsonable_encoder before a stock JSONResponse
+    return ORJSONModelResponse(content).body, JSONResponse(jsonable_encoder(content)).body
+
+
+def test_renders_nested_models_datetimes_and_uuids_like_json_response():
+    owner = User(email="owner@example.com", full_name="Zoë", role=UserRole.ADMIN, last_login=datetime(2024, 5, 1))
+    events = [
+        Event(id=UUID(int=1), at=datetime(2024, 1, 2, 3, 4, 5, 678), type="naive"),
+        Event(id=UUID(int=2), at=datetime(2024, 1, 2, tzinfo=timezone.utc), type="utc"),
+        Event(id=UUID(int=3), at=datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=5))), type="offset"),
+    ]
+    feed = Feed(events=events, latest=events[-1], owner=owner)
+    for content in (feed, [feed, feed], {"feed": feed}, Token(access_token="t", expires_in=60, user=owner)):
+        orjson_body, json_body = render_both(content)
+        assert orjson_body == json_body
+
+
+def test_default_response_class_follows_perf_profile(monkeypatch):
+    monkeypatch.setattr(responses, "PERF_PROFILE", "fast")
+    assert default_response_class() is ORJSONModelResponse
+    monkeypatch.setattr(responses, "PERF_PROFILE", "default")
+    assert default_response_class() is JSONResponse
@@ -0,0 +1,42 @@
+import asyncio
+
+from backend.streaming import StatusCheckHub
+
+
+def check(client_name, n=0):
+    return {"id": str(n), "client_name": client_name}
+
+
+def test_slow_subscriber_drops_its_oldest_events():
+    async def scenario():
+        hub = StatusCheckHub(max_queue=2)
+        subscription = hub.subscribe()
+        for n in range(3):
+            hub.publish(check("a", n))
+        return subscription.dropped, [(await subscription.get())["id"] for _ in range(2)]
+
+    assert asyncio.run(scenario()) == (1, ["1", "2"])
+
+
+def test_subscriber_cap_and_unsubscribe():
+    async def scenario():
+        hub = StatusCheckHub(max_subscribers=2)
+        first, second = hub.subscribe(), hub.subscribe()
+        assert hub.full and hub.subscribe() is None
+        first.close()
+        assert not hub.full and hub.subscribe() is not None
+        assert hub.subscriber_count == 2
+        second.close()
+
+    asyncio.run(scenario())
+
+
+def test_client_name_filter():
+    async def scenario():
+        hub = StatusCheckHub()
+        filtered, everything = hub.subscribe("a"), hub.subscribe()
+        hub.publish(check("b", 1))
+        hub.publish(check("a", 2))
+        return [(await filtered.get())["id"]], filtered.queue.qsize(), everything.queue.qsize()
+
+    assert asyncio.run(scenario()) == (["2"], 0, 2)
@@ -0,0 +1,50 @@
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from backend.models import StatusCheck
+from backend.warmup import configured_steps, warm_serializers
+
+
+def test_every_response_model_of_the_app_is_warmed(caplog):
+    from backend import server
+
+    with_response_model = [
+        route for route in server.app.routes if isinstance(route, APIRoute) and route.response_field is not None
+    ]
+    assert with_response_model
+    # A new response model without a warmup sample would lower the count
+    assert warm_serializers(server.app) == len(with_response_model)
+    assert not [record for record in caplog.records if record.name == "backend.warmup"]
+
+
+def test_routes_without_a_sample_are_skipped():
+    class Unknown(BaseModel):
+        value: int
+
+    app = FastAPI()
+
+    @app.get("/checks", response_model=List[StatusCheck])
+    async def checks():
+        return []
+
+    @app.get("/unknown", response_model=Unknown)
+    async def unknown():
+        return Unknown(value=1)
+
+    @app.get("/plain")
+    async def plain():
+        return {}
+
+    assert warm_serializers(app) == 1
+
+
+def test_configured_steps(monkeypatch):
+    monkeypatch.delenv("WARMUP_STEPS", raising=False)
+    assert configured_steps() == ["pool", "serializers", "auth"]
+    monkeypatch.setenv("WARMUP_STEPS", " replay, serializers ,unknown,,pool")
+    assert configured_steps() == ["replay", "serializers", "pool"]
+    monkeypatch.setenv("WARMUP_STEPS", "")
+    assert configured_steps() == []